@@ -0,0 +1,539 @@
+import gzip
+import mmap
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# --- Anvil Format ---
+SECTOR_BYTES = 4096 # Region files are laid out in 4 KiB sectors
+REGION_CHUNKS = 32 # A region file holds 32x32 chunks
+SECTION_HEIGHT = 16 # Blocks per chunk section along Y
+SECTION_BLOCKS = 4096 # 16x16x16 blocks, stored in YZX order
+COMPRESSION_GZIP, COMPRESSION_ZLIB, COMPRESSION_NONE = 1, 2, 3
+EXTERNAL_CHUNK_FLAG = 128 # Set on the compression byte of chunks stored in a c.<x>.<z>.mcc file
+MAX_CHUNK_SECTORS = 255 # The header's sector count is one byte; larger chunks live in .mcc files
+AIR_BLOCKS = {"minecraft:air", "minecraft:cave_air", "minecraft:void_air"}
+COLUMN_COUNT = 256 # Block columns per chunk, the entries of a heightmap (index = z * 16 + x)
+SURFACE_HEIGHTMAP = "WORLD_SURFACE" # Counts every non-air block; MOTION_BLOCKING would miss torches, flowers and the like
+# Chunk statuses whose blocks are final; anything earlier would still be changed by world generation
+FINISHED_CHUNK_STATUSES = {"full", "fullchunk", "postprocessed"}
+
+# --- NBT Reading ---
+TAG_END, TAG_BYTE, TAG_SHORT, TAG_INT, TAG_LONG, TAG_FLOAT, TAG_DOUBLE = 0, 1, 2, 3, 4, 5, 6
+TAG_BYTE_ARRAY, TAG_STRING, TAG_LIST, TAG_COMPOUND, TAG_INT_ARRAY, TAG_LONG_ARRAY = 7, 8, 9, 10, 11, 12
+SCALAR_FORMATS = {TAG_BYTE: ">b", TAG_SHORT: ">h", TAG_INT: ">i", TAG_LONG: ">q", TAG_FLOAT: ">f", TAG_DOUBLE: ">d"}
+ARRAY_ITEM_BYTES = {TAG_BYTE_ARRAY: 1, TAG_INT_ARRAY: 4, TAG_LONG_ARRAY: 8}
+
+def decode_long_array(raw, signed=True):
+    """Decodes the raw big-endian bytes of an NBT long array (as parse_nbt leaves them) into a tuple of ints."""
+    return struct.unpack(f">{len(raw) // 8}{'q' if signed else 'Q'}", raw)
+
+def unpack_values(longs, bits, count):
+    """
+    Unpacks count fixed-width unsigned values from a packed long array. Handles the 1.16+ packing, where values
+    never straddle two longs, and the older packing, where they run on from one long into the next.
+    """
+    mask = (1 << bits) - 1
+    if 64 % bits and len(longs) == count * bits // 64:
+        # Pre-1.16: one continuous bit stream across the longs
+        stream = int.from_bytes(b"".join(value.to_bytes(8, "little") for value in longs), "little")
+        return [(stream >> (index * bits)) & mask for index in range(count)]
+    shifts = range(0, (64 // bits) * bits, bits)
+    return [(value >> shift) & mask for value in longs for shift in shifts][:count]
+
+def section_block_indices(raw_data, palette_size):
+    """Unpacks a section's block states into its 4096 palette indices, in YZX order (index = (y * 16 + z) * 16 + x)."""
+    if palette_size <= 1 or raw_data is None or not len(raw_data):
+        return [0] * SECTION_BLOCKS
+    return unpack_values(decode_long_array(raw_data, signed=False), max(4, (palette_size - 1).bit_length()), SECTION_BLOCKS)
+
+def _read_string(data, offset):
+    """Reads a length-prefixed (modified) UTF-8 string; returns (string, next_offset)."""
+    length = struct.unpack_from(">H", data, offset)[0]
+    start = offset + 2
+    return bytes(data[start:start + length]).decode("utf-8", errors="replace"), start + length
+
+def _read_payload(data, offset, tag_type):
+    """Reads one tag payload of tag_type at offset; returns (value, next_offset)."""
+    if tag_type in SCALAR_FORMATS:
+        value_format = SCALAR_FORMATS[tag_type]
+        return struct.unpack_from(value_format, data, offset)[0], offset + struct.calcsize(value_format)
+    if tag_type == TAG_STRING:
+        return _read_string(data, offset)
+    if tag_type in ARRAY_ITEM_BYTES:
+        length = struct.unpack_from(">i", data, offset)[0]
+        start = offset + 4
+        end = start + length * ARRAY_ITEM_BYTES[tag_type]
+        return data[start:end], end # Left undecoded: most arrays are never looked at
+    if tag_type == TAG_LIST:
+        item_type, length = struct.unpack_from(">bi", data, offset)
+        offset += 5
+        items = []
+        for _ in range(max(0, length)):
+            item, offset = _read_payload(data, offset, item_type)
+            items.append(item)
+        return items, offset
+    if tag_type == TAG_COMPOUND:
+        compound = {}
+        while True:
+            child_type = data[offset]
+            offset += 1
+            if child_type == TAG_END:
+                return compound, offset
+            name, offset = _read_string(data, offset)
+            compound[name], offset = _read_payload(data, offset, child_type)
+    raise ValueError(f"Unknown NBT tag type {tag_type} at offset {offset}.")
+
+def parse_nbt(data):
+    """
+    Parses an uncompressed NBT document whose root is a compound; returns the root compound as a dict.
+    Byte/int/long arrays come back as memoryviews of their raw big-endian bytes (see decode_long_array).
+    """
+    data = memoryview(data)
+    if data[0] != TAG_COMPOUND:
+        raise ValueError("NBT root is not a compound.")
+    _, offset = _read_string(data, 1)
+    root, _ = _read_payload(data, offset, TAG_COMPOUND)
+    return root
+
+# --- Region Files ---
+def region_file_path(world_dir, region_x, region_z, folder="region"):
+    """Returns the path of r.<x>.<z>.mca in a world folder's region (or entities/poi) folder."""
+    return os.path.join(world_dir, folder, f"r.{region_x}.{region_z}.mca")
+
+def read_raw_chunk(region_data, local_x, local_z):
+    """
+    Returns (compression, payload) for one chunk of a region file's bytes (e.g. an mmap), still compressed,
+    or None if the chunk was never generated. local_x/local_z are 0..31 within the region. For chunks kept in
+    an external .mcc file, compression has EXTERNAL_CHUNK_FLAG set and the payload is empty.
+    """
+    header_offset = 4 * (local_x + local_z * REGION_CHUNKS)
+    location = int.from_bytes(region_data[header_offset:header_offset + 3], "big")
+    if location == 0 or len(region_data) < SECTOR_BYTES * 2:
+        return None
+    start = location * SECTOR_BYTES
+    length, compression = struct.unpack_from(">iB", region_data, start)
+    return compression, bytes(region_data[start + 5:start + 4 + length])
+
+def decompress_chunk(compression, payload):
+    """Returns the uncompressed NBT of a chunk payload, or None for compressions this reader does not handle (LZ4)."""
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if compression == COMPRESSION_GZIP:
+        return gzip.decompress(payload)
+    if compression == COMPRESSION_NONE:
+        return payload
+    return None
+
+def read_chunk_nbt(region_data, local_x, local_z):
+    """
+    Reads one chunk from the bytes of a region file (e.g. an mmap). local_x/local_z are 0..31 within the region.
+    Returns the chunk's root compound, or None if the chunk was never generated or is stored in a way
+    this reader does not handle (external .mcc files, LZ4).
+    """
+    raw_chunk = read_raw_chunk(region_data, local_x, local_z)
+    data = None if raw_chunk is None else decompress_chunk(*raw_chunk)
+    return None if data is None else parse_nbt(data)
+
+def external_chunk_path(region_dir, chunk_x, chunk_z):
+    """Returns the path of the c.<x>.<z>.mcc file holding a chunk too large for its region file."""
+    return os.path.join(region_dir, f"c.{chunk_x}.{chunk_z}.mcc")
+
+def _read_external_chunk(region_dir, chunk_x, chunk_z):
+    """Returns the payload of a chunk kept in a .mcc file, or None if that file is missing."""
+    try:
+        with open(external_chunk_path(region_dir, chunk_x, chunk_z), "rb") as external_file:
+            return external_file.read()
+    except FileNotFoundError:
+        return None
+
+def load_region_chunks(region_dir, region_x, region_z):
+    """
+    Reads every chunk of r.<x>.<z>.mca in region_dir, still compressed. Chunks kept in .mcc files are read from
+    there. Returns {(local_x, local_z): (compression, payload, timestamp)}; empty if the region file does not exist.
+    A chunk whose .mcc file is missing keeps EXTERNAL_CHUNK_FLAG and an empty payload: decompress_chunk treats it
+    as unreadable, and write_region_chunks writes the same reference back, so the chunk is never dropped.
+    Any other read error is raised rather than returning part of the file.
+    """
+    region_path = os.path.join(region_dir, f"r.{region_x}.{region_z}.mca")
+    chunks = {}
+    try:
+        region_file = open(region_path, "rb")
+    except FileNotFoundError:
+        return chunks
+    with region_file:
+        if os.fstat(region_file.fileno()).st_size < SECTOR_BYTES * 2:
+            return chunks
+        with mmap.mmap(region_file.fileno(), 0, access=mmap.ACCESS_READ) as region_data:
+            for local_z in range(REGION_CHUNKS):
+                for local_x in range(REGION_CHUNKS):
+                    raw_chunk = read_raw_chunk(region_data, local_x, local_z)
+                    if raw_chunk is None:
+                        continue
+                    compression, payload = raw_chunk
+                    if compression & EXTERNAL_CHUNK_FLAG:
+                        external_payload = _read_external_chunk(region_dir, region_x * REGION_CHUNKS + local_x, region_z * REGION_CHUNKS + local_z)
+                        if external_payload is not None:
+                            compression, payload = compression & ~EXTERNAL_CHUNK_FLAG, external_payload
+                    timestamp_offset = SECTOR_BYTES + 4 * (local_x + local_z * REGION_CHUNKS)
+                    chunks[(local_x, local_z)] = (compression, payload, int.from_bytes(region_data[timestamp_offset:timestamp_offset + 4], "big"))
+    return chunks
+
+def write_region_chunks(region_dir, region_x, region_z, chunks):
+    """
+    Writes r.<x>.<z>.mca in region_dir from {(local_x, local_z): (compression, payload, timestamp)}, packing the
+    chunks into consecutive sectors. Chunks over the 1 MiB limit go to .mcc files, as the game does.
+    The file is written to a temporary name first and then swapped in, so a failed write leaves the old file.
+    """
+    os.makedirs(region_dir, exist_ok=True)
+    header = bytearray(SECTOR_BYTES * 2)
+    body = bytearray()
+    for (local_x, local_z), (compression, payload, timestamp) in sorted(chunks.items(), key=lambda item: (item[0][1], item[0][0])):
+        if 5 + len(payload) > MAX_CHUNK_SECTORS * SECTOR_BYTES:
+            chunk_x, chunk_z = region_x * REGION_CHUNKS + local_x, region_z * REGION_CHUNKS + local_z
+            with open(external_chunk_path(region_dir, chunk_x, chunk_z), "wb") as external_file:
+                external_file.write(payload)
+            compression, payload = compression | EXTERNAL_CHUNK_FLAG, b""
+        record = struct.pack(">iB", len(payload) + 1, compression) + payload
+        sector_count = -(-len(record) // SECTOR_BYTES)
+        header_offset = 4 * (local_x + local_z * REGION_CHUNKS)
+        header[header_offset:header_offset + 4] = ((2 + len(body) // SECTOR_BYTES) << 8 | sector_count).to_bytes(4, "big")
+        header[SECTOR_BYTES + header_offset:SECTOR_BYTES + header_offset + 4] = timestamp.to_bytes(4, "big")
+        body += record + bytes(sector_count * SECTOR_BYTES - len(record))
+
+    region_path = os.path.join(region_dir, f"r.{region_x}.{region_z}.mca")
+    temporary_path = region_path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+    os.replace(temporary_path, region_path)
+
+def chunk_section_blocks(chunk):
+    """
+    Returns {section_y: (palette, raw_data)} for a chunk, where palette lists the block names the section uses
+    (None if the section has no palette this reader understands) and raw_data holds its packed block states
+    (see section_block_indices). Handles the 1.18+ layout and the older 'Level'/'Sections' one.
+    Returns None for chunks whose generation is not finished.
+    """
+    level = chunk.get("Level", chunk)
+    status = level.get("Status", chunk.get("Status", "full"))
+    if status.split(":")[-1] not in FINISHED_CHUNK_STATUSES:
+        return None
+    sections = {}
+    for section in level.get("sections", level.get("Sections", [])):
+        if "block_states" in section:
+            palette, raw_data = section["block_states"].get("palette", []), section["block_states"].get("data")
+        elif "Palette" in section:
+            palette, raw_data = section["Palette"], section.get("BlockStates")
+        elif "Blocks" in section:
+            palette, raw_data = None, None # Pre-1.13 numeric block IDs
+        else:
+            continue # Lighting-only section without blocks
+        sections[section["Y"]] = (None if palette is None else [entry.get("Name") for entry in palette], raw_data)
+    return sections
+
+def chunk_sections(chunk):
+    """Returns {section_y: palette} for a chunk (see chunk_section_blocks), or None for chunks whose generation is not finished."""
+    sections = chunk_section_blocks(chunk)
+    if sections is None:
+        return None
+    return {section_y: palette for section_y, (palette, _) in sections.items()}
+
+def occupied_section_ys(chunk):
+    """Returns the frozenset of section Y indices holding anything but air, or None if the chunk cannot be judged."""
+    sections = chunk_sections(chunk)
+    if sections is None:
+        return None
+    occupied = set()
+    for section_y, palette in sections.items():
+        if palette is None or any(name not in AIR_BLOCKS for name in palette):
+            occupied.add(section_y)
+    return frozenset(occupied)
+
+def surface_heights(chunk):
+    """
+    Returns the Y of the highest non-air block in each of the chunk's 256 columns (min_y - 1 for empty columns),
+    read from its WORLD_SURFACE heightmap; None if the chunk is unfinished or has no such heightmap (pre-1.13).
+    """
+    sections = chunk_section_blocks(chunk)
+    heightmap = chunk.get("Level", chunk).get("Heightmaps", {}).get(SURFACE_HEIGHTMAP)
+    if sections is None or heightmap is None or not len(heightmap):
+        return None
+    # 1.18+ worlds start at their lowest section; older ones at Y 0. Heights count from there.
+    min_y = 0 if "Level" in chunk or not sections else min(sections) * SECTION_HEIGHT
+    longs = decode_long_array(heightmap, signed=False)
+    if len(longs) * 64 % COLUMN_COUNT == 0:
+        bits = len(longs) * 64 // COLUMN_COUNT
+    else:
+        bits = 64 // -(-COLUMN_COUNT // len(longs))
+    return [min_y + height - 1 for height in unpack_values(longs, bits, COLUMN_COUNT)]
+
+def _scan_region_file(task):
+    """Worker: reads the given chunks from one region file; returns [((chunk_x, chunk_z), occupied_section_ys or None)]."""
+    region_path, chunk_coords, chunk_reader = task
+    results = []
+    try:
+        with open(region_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < SECTOR_BYTES * 2:
+                return [(chunk, None) for chunk in chunk_coords]
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as region_data:
+                for chunk_x, chunk_z in chunk_coords:
+                    try:
+                        chunk = read_chunk_nbt(region_data, chunk_x % REGION_CHUNKS, chunk_z % REGION_CHUNKS)
+                        results.append(((chunk_x, chunk_z), None if chunk is None else chunk_reader(chunk)))
+                    except (ValueError, zlib.error, OSError, struct.error, IndexError, KeyError, AttributeError):
+                        results.append(((chunk_x, chunk_z), None)) # Corrupt chunk: treat as unknown
+    except FileNotFoundError:
+        return [(chunk, None) for chunk in chunk_coords]
+    return results
+
+def scan_chunks(world_dir, chunks, chunk_reader=occupied_section_ys, workers=None):
+    """
+    Reads chunk_reader(chunk) for every (chunk_x, chunk_z) in chunks from a world folder's region files.
+    Region files are memory-mapped and handed to a process pool, one task per file (workers=None uses every CPU).
+    chunk_reader must be a module-level function (or a functools.partial of one) so it can be sent to the workers.
+    Returns {(chunk_x, chunk_z): value}, with None for chunks that are missing or unreadable.
+    """
+    chunks_by_region = {}
+    for chunk_x, chunk_z in chunks:
+        region = (chunk_x // REGION_CHUNKS, chunk_z // REGION_CHUNKS)
+        chunks_by_region.setdefault(region, []).append((chunk_x, chunk_z))
+    tasks = [(region_file_path(world_dir, region_x, region_z), sorted(region_chunks), chunk_reader)
+             for (region_x, region_z), region_chunks in sorted(chunks_by_region.items())]
+
+    if len(tasks) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            region_results = list(executor.map(_scan_region_file, tasks))
+    else:
+        region_results = [_scan_region_file(task) for task in tasks]
+    return {chunk: value for results in region_results for chunk, value in results}
+
+# --- Moving Chunks ---
+# Lists whose compounds carry absolute block positions as x/y/z ints, and how their elements are treated
+POSITION_LIST_CONTEXTS = {
+    "block_entities": "block_position", "TileEntities": "block_position",
+    "block_ticks": "block_position", "fluid_ticks": "block_position",
+    "TileTicks": "block_position", "LiquidTicks": "block_position",
+    "Entities": "entity", "Passengers": "entity",
+    "Records": "poi_record",
+}
+
+def _skip_payload(data, offset, tag_type):
+    """Returns the offset just past one tag payload, without building its value."""
+    if tag_type in SCALAR_FORMATS:
+        return offset + struct.calcsize(SCALAR_FORMATS[tag_type])
+    if tag_type == TAG_STRING:
+        return offset + 2 + struct.unpack_from(">H", data, offset)[0]
+    if tag_type in ARRAY_ITEM_BYTES:
+        return offset + 4 + struct.unpack_from(">i", data, offset)[0] * ARRAY_ITEM_BYTES[tag_type]
+    return _shift_payload(data, offset, tag_type, "other", (0, 0))
+
+def _add_to_int(data, offset, amount):
+    struct.pack_into(">i", data, offset, struct.unpack_from(">i", data, offset)[0] + amount)
+
+def _shift_payload(data, offset, tag_type, context, shift):
+    """
+    Walks one tag payload of a bytearray holding chunk NBT, adding the (block_dx, block_dz) shift to the positions
+    that the context says are absolute. Returns the offset just past the payload.
+    """
+    block_dx, block_dz = shift
+    if tag_type == TAG_LIST:
+        item_type, length = struct.unpack_from(">bi", data, offset)
+        offset += 5
+        for _ in range(max(0, length)):
+            offset = _shift_payload(data, offset, item_type, context, shift) if item_type in (TAG_LIST, TAG_COMPOUND) else _skip_payload(data, offset, item_type)
+        return offset
+    if tag_type != TAG_COMPOUND:
+        return _skip_payload(data, offset, tag_type)
+    while True:
+        child_type = data[offset]
+        offset += 1
+        if child_type == TAG_END:
+            return offset
+        name, offset = _read_string(data, offset)
+        if context == "chunk" and child_type == TAG_INT and name in ("xPos", "zPos"):
+            _add_to_int(data, offset, (block_dx if name == "xPos" else block_dz) // SECTION_HEIGHT)
+        elif context == "chunk" and child_type == TAG_INT_ARRAY and name == "Position": # 1.17+ entities files
+            _add_to_int(data, offset + 4, block_dx // SECTION_HEIGHT)
+            _add_to_int(data, offset + 8, block_dz // SECTION_HEIGHT)
+        elif context == "block_position" and child_type == TAG_INT and name in ("x", "z"):
+            _add_to_int(data, offset, block_dx if name == "x" else block_dz)
+        elif context == "entity" and child_type == TAG_INT and name in ("TileX", "TileZ"): # Paintings, item frames
+            _add_to_int(data, offset, block_dx if name == "TileX" else block_dz)
+        elif context == "entity" and child_type == TAG_LIST and name == "Pos" and data[offset] == TAG_DOUBLE:
+            x_offset, z_offset = offset + 5, offset + 5 + 16
+            struct.pack_into(">d", data, x_offset, struct.unpack_from(">d", data, x_offset)[0] + block_dx)
+            struct.pack_into(">d", data, z_offset, struct.unpack_from(">d", data, z_offset)[0] + block_dz)
+        elif context == "poi_record" and child_type == TAG_INT_ARRAY and name == "pos":
+            _add_to_int(data, offset + 4, block_dx)
+            _add_to_int(data, offset + 12, block_dz)
+
+        if child_type == TAG_LIST:
+            offset = _shift_payload(data, offset, child_type, POSITION_LIST_CONTEXTS.get(name, "other"), shift)
+        elif child_type == TAG_COMPOUND:
+            offset = _shift_payload(data, offset, child_type, "chunk" if context == "chunk" and name == "Level" else "other", shift)
+        else:
+            offset = _skip_payload(data, offset, child_type)
+
+def shift_chunk_nbt(data, block_dx, block_dz):
+    """
+    Returns a copy of uncompressed chunk NBT (from a region, entities or poi file) moved by a chunk-aligned
+    (block_dx, block_dz): chunk coordinates, block entity and scheduled tick positions, entity positions and
+    point-of-interest positions are rewritten in place. Every other byte is left as it was.
+    """
+    if block_dx % SECTION_HEIGHT or block_dz % SECTION_HEIGHT:
+        raise ValueError("Chunks can only be moved by multiples of 16 blocks.")
+    data = bytearray(data)
+    if data[0] != TAG_COMPOUND:
+        raise ValueError("NBT root is not a compound.")
+    _, offset = _read_string(data, 1)
+    _shift_payload(data, offset, TAG_COMPOUND, "chunk", (block_dx, block_dz))
+    return bytes(data)
+
+# --- Tile Queries ---
+def tile_chunks(bbox):
+    """Returns the (chunk_x, chunk_z) columns an inclusive (x1,y1,z1,x2,y2,z2) box touches."""
+    return [(chunk_x, chunk_z)
+            for chunk_x in range(bbox[0] // SECTION_HEIGHT, bbox[3] // SECTION_HEIGHT + 1)
+            for chunk_z in range(bbox[2] // SECTION_HEIGHT, bbox[5] // SECTION_HEIGHT + 1)]
+
+def is_air_tile(bbox, occupied_sections):
+    """
+    True if every chunk section the box touches is known to hold only air. occupied_sections maps chunks to
+    occupied_section_ys results; a missing or unreadable chunk counts as occupied, so the tile is kept.
+    """
+    lowest_section, highest_section = bbox[1] // SECTION_HEIGHT, bbox[4] // SECTION_HEIGHT
+    for chunk in tile_chunks(bbox):
+        occupied = occupied_sections.get(chunk)
+        if occupied is None or any(lowest_section <= section_y <= highest_section for section_y in occupied):
+            return False
+    return True
+
+def _clip_span(low, high, start, length):
+    """Returns the part of the inclusive span low..high inside start..start+length-1, or None."""
+    low, high = max(low, start), min(high, start + length - 1)
+    return (low, high) if low <= high else None
+
+def _extend_extent(extent, x1, y1, z1, x2, y2, z2):
+    """Returns the smallest box holding both extent (or None) and the given box."""
+    if extent is None:
+        return [x1, y1, z1, x2, y2, z2]
+    return [min(extent[0], x1), min(extent[1], y1), min(extent[2], z1),
+            max(extent[3], x2), max(extent[4], y2), max(extent[5], z2)]
+
+def _layer_extent(block_indices, solid, local_y, local_x1, local_x2, local_z1, local_z2):
+    """Returns (x1, z1, x2, z2), the local bounds of the solid blocks in one Y layer of a section, or None."""
+    bounds = None
+    for local_z in range(local_z1, local_z2 + 1):
+        row_start = (local_y * SECTION_HEIGHT + local_z) * SECTION_HEIGHT
+        solid_xs = [local_x for local_x in range(local_x1, local_x2 + 1) if block_indices[row_start + local_x] in solid]
+        if solid_xs:
+            if bounds is None:
+                bounds = [solid_xs[0], local_z, solid_xs[-1], local_z]
+            else:
+                bounds = [min(bounds[0], solid_xs[0]), bounds[1], max(bounds[2], solid_xs[-1]), local_z]
+    return bounds
+
+def non_air_extents(bboxes, chunk):
+    """
+    Chunk reader for trim_boxes: returns {bbox_index: [x1,y1,z1,x2,y2,z2]}, the tightest box around the non-air
+    blocks each of bboxes has in this chunk (boxes that are all air here are left out), or None if the chunk
+    cannot be judged. Sections whose palette holds no air are taken whole without unpacking them.
+    """
+    sections = chunk_section_blocks(chunk)
+    if sections is None:
+        return None
+    level = chunk.get("Level", chunk)
+    chunk_min_x, chunk_min_z = level["xPos"] * SECTION_HEIGHT, level["zPos"] * SECTION_HEIGHT
+    unpacked_sections = {}
+    extents = {}
+    for index, bbox in enumerate(bboxes):
+        x_span = _clip_span(bbox[0], bbox[3], chunk_min_x, SECTION_HEIGHT)
+        z_span = _clip_span(bbox[2], bbox[5], chunk_min_z, SECTION_HEIGHT)
+        if x_span is None or z_span is None:
+            continue
+        extent = None
+        for section_y, (palette, raw_data) in sections.items():
+            y_span = _clip_span(bbox[1], bbox[4], section_y * SECTION_HEIGHT, SECTION_HEIGHT)
+            if y_span is None:
+                continue
+            solid = None if palette is None else {slot for slot, name in enumerate(palette) if name not in AIR_BLOCKS}
+            if solid is not None and not solid:
+                continue
+            if solid is None or len(solid) == len(palette):
+                extent = _extend_extent(extent, x_span[0], y_span[0], z_span[0], x_span[1], y_span[1], z_span[1])
+                continue
+            if section_y not in unpacked_sections:
+                unpacked_sections[section_y] = section_block_indices(raw_data, len(palette))
+            block_indices = unpacked_sections[section_y]
+            layer_ys = range(y_span[0], y_span[1] + 1)
+            if extent is not None and extent[0] <= x_span[0] and extent[3] >= x_span[1] and extent[2] <= z_span[0] and extent[5] >= z_span[1]:
+                # X and Z are already covered: only the lowest and highest solid layers outside the extent matter
+                lower_ys = [y for y in layer_ys if y < extent[1]]
+                upper_ys = [y for y in reversed(layer_ys) if y > extent[4]]
+                for ys in (lower_ys, upper_ys):
+                    for y in ys:
+                        if _layer_extent(block_indices, solid, y - section_y * SECTION_HEIGHT, x_span[0] - chunk_min_x, x_span[1] - chunk_min_x, z_span[0] - chunk_min_z, z_span[1] - chunk_min_z):
+                            extent = _extend_extent(extent, x_span[0], y, z_span[0], x_span[1], y, z_span[1])
+                            break
+                continue
+            for y in layer_ys:
+                layer = _layer_extent(block_indices, solid, y - section_y * SECTION_HEIGHT, x_span[0] - chunk_min_x, x_span[1] - chunk_min_x, z_span[0] - chunk_min_z, z_span[1] - chunk_min_z)
+                if layer:
+                    extent = _extend_extent(extent, chunk_min_x + layer[0], y, chunk_min_z + layer[1], chunk_min_x + layer[2], y, chunk_min_z + layer[3])
+        if extent is not None:
+            extents[index] = extent
+    return extents
+
+def trim_boxes(world_dir, bboxes, workers=None):
+    """
+    Shrinks each inclusive (x1,y1,z1,x2,y2,z2) box to the tightest box around its non-air blocks in the world
+    at world_dir. Returns a list in the same order, with None for boxes that hold only air. Missing or
+    unreadable chunks count as solid over the box's whole height, so the trimmed box still covers them.
+    """
+    needed_chunks = {chunk for bbox in bboxes for chunk in tile_chunks(bbox)}
+    chunk_extents = scan_chunks(world_dir, needed_chunks, chunk_reader=partial(non_air_extents, list(bboxes)), workers=workers)
+    trimmed = []
+    for index, bbox in enumerate(bboxes):
+        extent = None
+        for chunk_x, chunk_z in tile_chunks(bbox):
+            extents = chunk_extents.get((chunk_x, chunk_z))
+            if extents is None:
+                x_span = _clip_span(bbox[0], bbox[3], chunk_x * SECTION_HEIGHT, SECTION_HEIGHT)
+                z_span = _clip_span(bbox[2], bbox[5], chunk_z * SECTION_HEIGHT, SECTION_HEIGHT)
+                extent = _extend_extent(extent, x_span[0], bbox[1], z_span[0], x_span[1], bbox[4], z_span[1])
+            elif index in extents:
+                extent = _extend_extent(extent, *extents[index])
+        trimmed.append(None if extent is None else tuple(extent))
+    return trimmed
+
+def find_surface_tops(world_dir, bboxes, workers=None):
+    """
+    Returns, for each inclusive (x1,y1,z1,x2,y2,z2) box, the Y of the highest non-air block in its columns according
+    to the chunk heightmaps, or None if any of its chunks has no usable heightmap. Each chunk is read once.
+    """
+    needed_chunks = {chunk for bbox in bboxes for chunk in tile_chunks(bbox)}
+    chunk_heights = scan_chunks(world_dir, needed_chunks, chunk_reader=surface_heights, workers=workers)
+    tops = []
+    for bbox in bboxes:
+        top = None
+        for chunk_x, chunk_z in tile_chunks(bbox):
+            heights = chunk_heights.get((chunk_x, chunk_z))
+            if heights is None:
+                top = None
+                break
+            x1, x2 = _clip_span(bbox[0], bbox[3], chunk_x * SECTION_HEIGHT, SECTION_HEIGHT)
+            z1, z2 = _clip_span(bbox[2], bbox[5], chunk_z * SECTION_HEIGHT, SECTION_HEIGHT)
+            chunk_top = max(heights[(z % SECTION_HEIGHT) * SECTION_HEIGHT + x % SECTION_HEIGHT]
+                            for z in range(z1, z2 + 1) for x in range(x1, x2 + 1))
+            top = chunk_top if top is None else max(top, chunk_top)
+        tops.append(top)
+    return tops
+
+def find_air_tiles(world_dir, bboxes, workers=None):
+    """Returns the indices of bboxes that hold only air in the world at world_dir, scanning each chunk once."""
+    needed_chunks = {chunk for bbox in bboxes for chunk in tile_chunks(bbox)}
+    occupied_sections = scan_chunks(world_dir, needed_chunks, workers=workers)
+    return {index for index, bbox in enumerate(bboxes) if is_air_tile(bbox, occupied_sections)}
@@ -0,0 +1,63 @@
+import random
+import sys
+import time
+from collections import deque
+
+from rich_main import (
+    calculate_overall_min_coords,
+    calculate_sub_regions_array,
+    iter_all_sub_regions,
+    iter_sub_region_rows,
+    np,
+)
+
+# --- Benchmark Configuration ---
+BOX_COUNT = 20000
+SUB_REGION_SIZE = 16
+TARGET_ORIGIN = (0, 64, 0)
+RANDOM_SEED = 1234
+
+def generate_boxes(count, seed):
+    """Generates random, normalized bounding boxes spread over a large area."""
+    rng = random.Random(seed)
+    boxes = []
+    for _ in range(count):
+        x1 = rng.randint(-30000, 30000)
+        z1 = rng.randint(-30000, 30000)
+        y1 = rng.randint(-64, 200)
+        boxes.append((x1, y1, z1, x1 + rng.randint(0, 96), y1 + rng.randint(0, 100), z1 + rng.randint(0, 96)))
+    return boxes
+
+def time_call(func):
+    """Runs func once and returns (result, elapsed_seconds)."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def main():
+    if np is None:
+        print("NumPy is not installed; nothing to compare against. Install it with 'pip install numpy'.")
+        sys.exit(1)
+
+    box_count = int(sys.argv[1]) if len(sys.argv) > 1 else BOX_COUNT
+    boxes = generate_boxes(box_count, RANDOM_SEED)
+    overall_min = calculate_overall_min_coords(boxes)
+
+    # Generation streams the sub-regions into command text, so each engine's output is consumed, not kept
+    _, python_time = time_call(lambda: deque(iter_all_sub_regions(boxes, SUB_REGION_SIZE, TARGET_ORIGIN, overall_min), maxlen=0))
+    sub_region_array, numpy_time = time_call(lambda: calculate_sub_regions_array(boxes, SUB_REGION_SIZE, TARGET_ORIGIN, overall_min))
+    _, convert_time = time_call(lambda: deque(iter_sub_region_rows(sub_region_array), maxlen=0))
+
+    python_result = list(iter_all_sub_regions(boxes, SUB_REGION_SIZE, TARGET_ORIGIN, overall_min))
+    if list(iter_sub_region_rows(sub_region_array)) != python_result:
+        print("MISMATCH: NumPy engine output differs from the Python engine!")
+        sys.exit(1)
+
+    print(f"Boxes: {box_count}, Sub-Region Size: {SUB_REGION_SIZE}, Sub-Regions: {len(python_result)}")
+    print(f"  python engine:              {python_time:8.3f} s")
+    print(f"  numpy engine (array only):  {numpy_time:8.3f} s  ({python_time / numpy_time:6.1f}x)")
+    print(f"  numpy engine (+ to tuples): {numpy_time + convert_time:8.3f} s  ({python_time / (numpy_time + convert_time):6.1f}x)")
+    print("Outputs match exactly.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import argparse
+import json
+import math
+import re
+import sys
+
+from rich_main import RICH_STYLES, SETTINGS_FILE, TICKS_PER_SECOND, console
+
+# --- Log Patterns ---
+# Server log lines start with a wall-clock timestamp, e.g. "[12:01:02] [Server thread/INFO]: ..."
+LOG_LINE_PATTERN = re.compile(r'^\[(\d{1,2}):(\d{2}):(\d{2})(?:\.(\d{1,3}))?[^\]]*\]\s*(?:\[[^\]]*\]:?\s*)*(.*)$')
+ISSUED_COMMAND_PATTERN = re.compile(r'^(\S+) issued server command: (/\S*)(.*)$')
+# WorldEdit/FAWE completion messages, e.g. "1234 blocks were copied.", "Operation completed (1,234 blocks affected)."
+BLOCKS_CHANGED_PATTERN = re.compile(r'([\d,]+) blocks?\b.*?\b(?:copied|pasted|changed|affected)', re.IGNORECASE)
+ELAPSED_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(ms|s)\b')
+# "Can't keep up! Is the server overloaded? Running 5012ms or 100 ticks behind"
+SERVER_LAG_PATTERN = re.compile(r"Can't keep up!.*?Running (\d+)ms or (\d+) ticks behind")
+
+COMMAND_CATEGORIES = {"/mvtp": "mvtp", "/tp": "tp", "//copy": "copy", "//paste": "paste"}
+
+# --- Calibration Defaults ---
+SAFETY_MARGIN = 1.25 # Fitted delays are stretched by this factor so slower-than-usual operations still finish
+TELEPORT_PERCENTILE = 0.95 # Teleport delays cover this share of the observed teleports
+MIN_TELEPORT_DELAY = 10 # Ticks; teleports still need time to send chunks even when the log shows no lag
+
+def parse_log_events(lines):
+    """
+    Turns server log lines into (seconds, kind, details) events in log order. Kinds are "command"
+    (details: player, category, text), "blocks" (details: block count, elapsed seconds or None) and
+    "lag" (details: ticks behind). Timestamps past midnight keep counting up.
+    """
+    events = []
+    day_offset = 0
+    previous_seconds = None
+    for line in lines:
+        match = LOG_LINE_PATTERN.match(line.strip())
+        if not match:
+            continue
+        hours, minutes, seconds, millis, message = match.groups()
+        timestamp = int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int((millis or "0").ljust(3, "0")) / 1000
+        if previous_seconds is not None and timestamp + day_offset < previous_seconds - 3600:
+            day_offset += 86400 # The clock wrapped past midnight
+        timestamp += day_offset
+        previous_seconds = timestamp
+
+        command_match = ISSUED_COMMAND_PATTERN.match(message)
+        if command_match:
+            player, command_name, arguments = command_match.groups()
+            category = COMMAND_CATEGORIES.get(command_name.lower())
+            if category:
+                events.append((timestamp, "command", (player, category, command_name + arguments)))
+            continue
+        lag_match = SERVER_LAG_PATTERN.search(message)
+        if lag_match:
+            events.append((timestamp, "lag", int(lag_match.group(2))))
+            continue
+        blocks_match = BLOCKS_CHANGED_PATTERN.search(message)
+        if blocks_match:
+            elapsed_match = ELAPSED_PATTERN.search(message[blocks_match.end():])
+            elapsed_seconds = None
+            if elapsed_match:
+                elapsed_seconds = float(elapsed_match.group(1)) / (1000 if elapsed_match.group(2) == "ms" else 1)
+            events.append((timestamp, "blocks", (int(blocks_match.group(1).replace(",", "")), elapsed_seconds)))
+    return events
+
+def collect_samples(events):
+    """
+    Pairs each //copy and //paste with the completion message that follows it, and each teleport with the
+    server lag logged before the next command. Returns {"copy": [(blocks, ticks)], "paste": [(blocks, ticks)],
+    "mvtp": [ticks], "tp": [ticks]}. A paste without its own block count uses the size of the last copy.
+    """
+    samples = {"copy": [], "paste": [], "mvtp": [], "tp": []}
+    pending_operation = None # (category, issued_at) of the //copy or //paste awaiting its completion message
+    pending_teleport = None # [category, lag ticks] of the teleport whose lag is still being added up
+    clipboard_blocks = None
+
+    def close_teleport():
+        if pending_teleport is not None:
+            samples[pending_teleport[0]].append(pending_teleport[1])
+
+    for timestamp, kind, details in events:
+        if kind == "command":
+            close_teleport()
+            pending_teleport = None
+            _, category, _ = details
+            if category in ("copy", "paste"):
+                pending_operation = (category, timestamp)
+            else:
+                pending_teleport = [category, 0]
+        elif kind == "lag" and pending_teleport is not None:
+            pending_teleport[1] += details
+        elif kind == "blocks" and pending_operation is not None:
+            category, issued_at = pending_operation
+            block_count, elapsed_seconds = details
+            if elapsed_seconds is None:
+                elapsed_seconds = timestamp - issued_at
+            if category == "copy":
+                clipboard_blocks = block_count
+            elif not block_count and clipboard_blocks:
+                block_count = clipboard_blocks
+            samples[category].append((block_count, elapsed_seconds * TICKS_PER_SECOND))
+            pending_operation = None
+    close_teleport()
+    return samples
+
+def fit_linear(points):
+    """Least-squares fit of ticks = intercept + slope * blocks. Returns (intercept, slope)."""
+    count = len(points)
+    mean_blocks = sum(blocks for blocks, _ in points) / count
+    mean_ticks = sum(ticks for _, ticks in points) / count
+    spread = sum((blocks - mean_blocks) ** 2 for blocks, _ in points)
+    if spread == 0:
+        # Every sample moved the same amount: all we can say is the cost per block of that size
+        return 0.0, mean_ticks / mean_blocks if mean_blocks else 0.0
+    slope = sum((blocks - mean_blocks) * (ticks - mean_ticks) for blocks, ticks in points) / spread
+    slope = max(slope, 0.0)
+    return max(mean_ticks - slope * mean_blocks, 0.0), slope
+
+def percentile(values, fraction):
+    """Returns the value below which the given fraction of values fall (nearest rank)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+def calibrate(samples, safety_margin=SAFETY_MARGIN):
+    """
+    Turns collected samples into settings values. Commands without samples are left out.
+    Returns (tuned_settings, report_lines), where report_lines holds (RICH_STYLES key, text) pairs.
+    """
+    tuned_settings = {}
+    report_lines = []
+    fixed_costs = [] # Per-command overhead of //copy and //paste, the floor for volume-scaled delays
+    for category in ("copy", "paste"):
+        points = samples[category]
+        if not points:
+            report_lines.append(("warning_text", f"//{category}: no samples, left unchanged"))
+            continue
+        intercept, slope = fit_linear(points)
+        tuned_settings[f'{category}_ticks_per_million_blocks'] = max(1, math.ceil(slope * 1_000_000 * safety_margin))
+        tuned_settings[f'{category}_delay'] = max(1, math.ceil(max(ticks for _, ticks in points) * safety_margin))
+        fixed_costs.append(math.ceil(intercept * safety_margin))
+        report_lines.append(("plain_text", f"//{category}: {len(points)} samples, {intercept:.1f} ticks + {slope * 1_000_000:.2f} ticks per million blocks"))
+    if fixed_costs:
+        tuned_settings['min_scaled_delay'] = max(1, max(fixed_costs))
+
+    for category in ("mvtp", "tp"):
+        lags = samples[category]
+        if not lags:
+            report_lines.append(("warning_text", f"/{category}: no samples, left unchanged"))
+            continue
+        typical_lag = percentile(lags, TELEPORT_PERCENTILE)
+        tuned_settings[f'{category}_delay'] = max(MIN_TELEPORT_DELAY, math.ceil(typical_lag * safety_margin))
+        report_lines.append(("plain_text", f"/{category}: {len(lags)} samples, {typical_lag} ticks of server lag at the {TELEPORT_PERCENTILE:.0%} percentile"))
+    return tuned_settings, report_lines
+
+def parse_arguments(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Fits copy/paste/teleport delays to the timings in a server log from a past run.")
+    parser.add_argument("log_file", help="Server log to read, e.g. logs/latest.log")
+    parser.add_argument("--settings", default=SETTINGS_FILE, help=f"Settings file to update (default: {SETTINGS_FILE}).")
+    parser.add_argument("--margin", type=float, default=SAFETY_MARGIN, help=f"Safety factor applied to fitted delays (default: {SAFETY_MARGIN}).")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the fitted values; do not write the settings file.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    try:
+        with open(args.log_file, 'r', encoding='utf-8', errors='replace') as f:
+            events = parse_log_events(f)
+    except OSError as e:
+        console.print(f"[{RICH_STYLES['error_text']}]Error: could not read log file '{args.log_file}': {e}[/]")
+        sys.exit(1)
+
+    tuned_settings, report_lines = calibrate(collect_samples(events), args.margin)
+    for style, line in report_lines:
+        console.print(f"[{RICH_STYLES[style]}]{line}[/]")
+    if not tuned_settings:
+        console.print(f"[{RICH_STYLES['error_text']}]No WorldEdit or teleport timings found in the log; nothing to calibrate.[/]")
+        sys.exit(1)
+    for key, value in tuned_settings.items():
+        console.print(f"[{RICH_STYLES['plain_text']}]  {key} = {value}[/]")
+    if args.dry_run:
+        return
+
+    try:
+        with open(args.settings, 'r') as f:
+            settings = json.load(f)
+    except FileNotFoundError:
+        settings = {}
+    except json.JSONDecodeError as e:
+        console.print(f"[{RICH_STYLES['error_text']}]Error decoding '{args.settings}': {e}. Not overwriting it.[/]")
+        sys.exit(1)
+    settings.update(tuned_settings)
+    with open(args.settings, 'w') as f:
+        json.dump(settings, f, indent=2)
+    console.print(f"[{RICH_STYLES['plain_text']}]Calibrated delays saved to '{args.settings}'.[/]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+import argparse
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from anvil_regions import (
+    COMPRESSION_GZIP,
+    COMPRESSION_NONE,
+    COMPRESSION_ZLIB,
+    EXTERNAL_CHUNK_FLAG,
+    REGION_CHUNKS,
+    SECTION_HEIGHT,
+    SECTOR_BYTES,
+    decompress_chunk,
+    load_region_chunks,
+    read_raw_chunk,
+    region_file_path,
+    shift_chunk_nbt,
+    tile_chunks,
+    write_region_chunks,
+)
+from rich_main import RICH_STYLES, calculate_overall_min_coords, console, load_batch_job_settings, load_default_settings
+
+# --- World Folders ---
+# Folders holding per-chunk region files; entities/ exists from 1.17 and poi/ from 1.14
+TRANSFER_FOLDERS = ("region", "entities", "poi")
+REGION_FILE_CHUNKS = REGION_CHUNKS * REGION_CHUNKS
+COPY_CHUNK_BYTES = 64 * 1024 * 1024 # Bytes handed to copy_file_range per call
+BUILD_HEIGHT = (-64, 319) # Default lowest and highest block Y, of 1.18+ overworlds; a chunk column spans all of it
+
+def chunk_offset(settings):
+    """
+    Returns the (chunk_dx, chunk_dz) the job moves its boxes by, or raises ValueError if the job's move is not
+    chunk-aligned: a multiple of 16 blocks along X and Z, and none along Y.
+    """
+    overall_src_min_coords = calculate_overall_min_coords(settings['source_bounding_boxes'])
+    block_dx, block_dy, block_dz = (target - source for target, source in zip(settings['target_paste_origin'], overall_src_min_coords))
+    if block_dy or block_dx % SECTION_HEIGHT or block_dz % SECTION_HEIGHT:
+        raise ValueError(f"The job moves its boxes by ({block_dx}, {block_dy}, {block_dz}) blocks; chunk transfers need "
+                         f"multiples of 16 along X and Z and 0 along Y.")
+    return block_dx // SECTION_HEIGHT, block_dz // SECTION_HEIGHT
+
+def boxes_not_covering_columns(bounding_boxes, build_height=BUILD_HEIGHT):
+    """
+    Returns the boxes that do not cover whole chunk columns: their X/Z edges miss chunk borders, or they do not
+    span build_height, the (lowest, highest) block Y of the world. Moving their chunks would also move the blocks
+    around them.
+    """
+    return [bbox for bbox in bounding_boxes
+            if bbox[0] % SECTION_HEIGHT or (bbox[3] + 1) % SECTION_HEIGHT
+            or bbox[2] % SECTION_HEIGHT or (bbox[5] + 1) % SECTION_HEIGHT
+            or bbox[1] > build_height[0] or bbox[4] < build_height[1]]
+
+def plan_region_tasks(source_world_dir, target_world_dir, bounding_boxes, chunk_dx, chunk_dz):
+    """
+    Groups the chunk columns the boxes touch by the target region file they land in.
+    Returns one task per target region file: (source_world_dir, target_world_dir, (region_x, region_z), chunk_moves),
+    where chunk_moves lists ((source_chunk_x, source_chunk_z), (target_chunk_x, target_chunk_z)).
+    """
+    moves_by_region = {}
+    for chunk_x, chunk_z in sorted({chunk for bbox in bounding_boxes for chunk in tile_chunks(bbox)}):
+        target_chunk = (chunk_x + chunk_dx, chunk_z + chunk_dz)
+        target_region = (target_chunk[0] // REGION_CHUNKS, target_chunk[1] // REGION_CHUNKS)
+        moves_by_region.setdefault(target_region, []).append(((chunk_x, chunk_z), target_chunk))
+    return [(source_world_dir, target_world_dir, target_region, chunk_moves)
+            for target_region, chunk_moves in sorted(moves_by_region.items())]
+
+def _local(chunk):
+    """Returns ((region_x, region_z), (local_x, local_z)) for absolute chunk coordinates."""
+    return (chunk[0] // REGION_CHUNKS, chunk[1] // REGION_CHUNKS), (chunk[0] % REGION_CHUNKS, chunk[1] % REGION_CHUNKS)
+
+def transfer_region_file(task):
+    """
+    Worker: moves the given chunks into one target region file, for region/, entities/ and poi/ alike.
+    Only chunks the source has in region/ are moved; their entities and points of interest replace the target's.
+    Every file is read and written once. Returns {"moved": n, "missing": n, "unreadable": n}.
+    """
+    source_world_dir, target_world_dir, (region_x, region_z), chunk_moves = task
+    result = {"moved": 0, "missing": 0, "unreadable": 0}
+    moved_chunks = [] # Moves whose source chunk was readable in region/; the other folders follow these
+    timestamp = int(time.time())
+    for folder in TRANSFER_FOLDERS:
+        source_dir = os.path.join(source_world_dir, folder)
+        target_dir = os.path.join(target_world_dir, folder)
+        if folder != "region" and not os.path.isdir(source_dir):
+            continue
+        source_regions = {} # Each source region file is memory-mapped and read once
+        target_chunks = load_region_chunks(target_dir, region_x, region_z)
+        changed = False
+        for source_chunk, target_chunk in (chunk_moves if folder == "region" else moved_chunks):
+            source_region, source_local = _local(source_chunk)
+            if source_region not in source_regions:
+                source_regions[source_region] = load_region_chunks(source_dir, *source_region)
+            _, target_local = _local(target_chunk)
+            raw_chunk = source_regions[source_region].get(source_local)
+            if raw_chunk is None:
+                if folder == "region":
+                    result["missing"] += 1 # Never generated in the source: the target keeps its own chunk
+                elif target_chunks.pop(target_local, None) is not None:
+                    changed = True # The source chunk has no entities or points of interest
+                continue
+            data = decompress_chunk(*raw_chunk[:2])
+            if data is None:
+                if folder == "region":
+                    result["unreadable"] += 1
+                continue
+            shifted = shift_chunk_nbt(data, (target_chunk[0] - source_chunk[0]) * SECTION_HEIGHT, (target_chunk[1] - source_chunk[1]) * SECTION_HEIGHT)
+            target_chunks[target_local] = (COMPRESSION_ZLIB, zlib.compress(shifted), timestamp)
+            changed = True
+            if folder == "region":
+                moved_chunks.append((source_chunk, target_chunk))
+        if changed:
+            write_region_chunks(target_dir, region_x, region_z, target_chunks)
+    result["moved"] = len(moved_chunks)
+    return result
+
+# --- Whole Region Files ---
+def whole_region_source(task):
+    """
+    Returns the source (region_x, region_z) if the task moves all 1024 chunks of one region file onto another
+    (a move by whole regions, a multiple of 512 blocks), or None.
+    """
+    _, _, _, chunk_moves = task
+    if len(chunk_moves) != REGION_FILE_CHUNKS:
+        return None
+    (source_chunk_x, source_chunk_z), (target_chunk_x, target_chunk_z) = chunk_moves[0]
+    if (target_chunk_x - source_chunk_x) % REGION_CHUNKS or (target_chunk_z - source_chunk_z) % REGION_CHUNKS:
+        return None
+    return source_chunk_x // REGION_CHUNKS, source_chunk_z // REGION_CHUNKS
+
+def _region_chunk_compressions(region_path):
+    """Returns the compression byte of every chunk in a region file, or None if the file does not exist."""
+    try:
+        with open(region_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < SECTOR_BYTES * 2:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as region_data:
+                compressions = []
+                for local_z in range(REGION_CHUNKS):
+                    for local_x in range(REGION_CHUNKS):
+                        header_offset = 4 * (local_x + local_z * REGION_CHUNKS)
+                        location = int.from_bytes(region_data[header_offset:header_offset + 3], "big")
+                        if location:
+                            compressions.append(region_data[location * SECTOR_BYTES + 4])
+                return compressions
+    except FileNotFoundError:
+        return None
+
+def can_copy_whole_region(source_world_dir, source_region, target_world_dir, target_region, needs_patching):
+    """
+    True if copying the source region's files over the target's gives the same result as moving its chunks one
+    by one. Checked for region/, entities/ and poi/ before anything is copied: no file may hold .mcc overflow
+    chunks, every chunk must be patchable if it has to be, and the source must have all 1024 chunks in region/
+    or the target must have no file that would lose chunks.
+    """
+    compressions = _region_chunk_compressions(region_file_path(source_world_dir, *source_region))
+    if not compressions:
+        return False
+    full_region = len(compressions) == REGION_FILE_CHUNKS
+    for folder in TRANSFER_FOLDERS:
+        if folder != "region":
+            if not os.path.isdir(os.path.join(source_world_dir, folder)):
+                continue
+            compressions = _region_chunk_compressions(region_file_path(source_world_dir, *source_region, folder)) or []
+        if any(compression & EXTERNAL_CHUNK_FLAG for compression in compressions):
+            return False
+        if needs_patching and any(compression not in (COMPRESSION_GZIP, COMPRESSION_ZLIB, COMPRESSION_NONE) for compression in compressions):
+            return False
+        if not full_region and os.path.exists(region_file_path(target_world_dir, *target_region, folder)):
+            return False
+    return True
+
+def copy_file(source_path, target_path):
+    """Copies a file inside the kernel with os.copy_file_range where available (Linux), else with shutil.copyfile."""
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(source_path, "rb") as source_file, open(target_path, "wb") as target_file:
+                while os.copy_file_range(source_file.fileno(), target_file.fileno(), COPY_CHUNK_BYTES):
+                    pass
+            return
+        except OSError:
+            pass # Filesystems or kernels without support; fall back to a regular copy
+    shutil.copyfile(source_path, target_path)
+
+def shift_region_file_in_place(region_path, block_dx, block_dz):
+    """
+    Moves every chunk of a freshly copied region file by (block_dx, block_dz). Each chunk is recompressed into its
+    own sectors when it still fits; the few that grew are appended at the end of the file. Timestamps are kept.
+    """
+    with open(region_path, "r+b") as f:
+        header = bytearray(f.read(SECTOR_BYTES))
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as region_data:
+            raw_chunks = {(local_x, local_z): read_raw_chunk(region_data, local_x, local_z)
+                          for local_z in range(REGION_CHUNKS) for local_x in range(REGION_CHUNKS)}
+            file_sectors = -(-len(region_data) // SECTOR_BYTES)
+        for (local_x, local_z), raw_chunk in raw_chunks.items():
+            if raw_chunk is None:
+                continue
+            payload = zlib.compress(shift_chunk_nbt(decompress_chunk(*raw_chunk), block_dx, block_dz))
+            record = struct.pack(">iB", len(payload) + 1, COMPRESSION_ZLIB) + payload
+            header_offset = 4 * (local_x + local_z * REGION_CHUNKS)
+            location, sector_count = int.from_bytes(header[header_offset:header_offset + 3], "big"), header[header_offset + 3]
+            if len(record) > sector_count * SECTOR_BYTES:
+                sector_count = -(-len(record) // SECTOR_BYTES)
+                location, file_sectors = file_sectors, file_sectors + sector_count
+                header[header_offset:header_offset + 4] = (location << 8 | sector_count).to_bytes(4, "big")
+            f.seek(location * SECTOR_BYTES)
+            f.write(record + bytes(sector_count * SECTOR_BYTES - len(record)))
+        f.seek(0)
+        f.write(header)
+
+def copy_region_files(task):
+    """
+    Worker: moves one whole region file, with its entities/ and poi/ files, by copying the files and then
+    patching the chunk positions (nothing to patch when the region keeps its coordinates). Falls back to
+    transfer_region_file when, in any of the three folders, a whole-file copy would lose target chunks, miss
+    .mcc files or leave chunks unpatched.
+    Returns the same counts as transfer_region_file, plus "whole_files": 1.
+    """
+    source_world_dir, target_world_dir, (region_x, region_z), chunk_moves = task
+    source_region_x, source_region_z = whole_region_source(task)
+    block_dx = (region_x - source_region_x) * REGION_CHUNKS * SECTION_HEIGHT
+    block_dz = (region_z - source_region_z) * REGION_CHUNKS * SECTION_HEIGHT
+    needs_patching = bool(block_dx or block_dz)
+    if not can_copy_whole_region(source_world_dir, (source_region_x, source_region_z),
+                                 target_world_dir, (region_x, region_z), needs_patching):
+        return dict(transfer_region_file(task), whole_files=0)
+
+    for folder in TRANSFER_FOLDERS:
+        source_path = region_file_path(source_world_dir, source_region_x, source_region_z, folder)
+        target_path = region_file_path(target_world_dir, region_x, region_z, folder)
+        if folder != "region" and not os.path.isdir(os.path.dirname(source_path)):
+            continue
+        if not os.path.exists(source_path):
+            if os.path.exists(target_path):
+                os.remove(target_path) # No entities or points of interest in the source region
+            continue
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        temporary_path = target_path + ".tmp"
+        copy_file(source_path, temporary_path)
+        if needs_patching:
+            shift_region_file_in_place(temporary_path, block_dx, block_dz)
+        os.replace(temporary_path, target_path)
+
+    moved = len(_region_chunk_compressions(region_file_path(target_world_dir, region_x, region_z)))
+    return {"moved": moved, "missing": len(chunk_moves) - moved, "unreadable": 0, "whole_files": 1}
+
+def transfer_task(task):
+    """Worker entry point: whole region files take the copy fast path, everything else moves chunk by chunk."""
+    if whole_region_source(task) is not None:
+        return copy_region_files(task)
+    return dict(transfer_region_file(task), whole_files=0)
+
+def run_chunk_transfer(tasks, workers=None):
+    """Runs the region tasks, in a process pool when there are several. Returns the summed counts."""
+    if len(tasks) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(transfer_task, tasks))
+    else:
+        results = [transfer_task(task) for task in tasks]
+    totals = {"moved": 0, "missing": 0, "unreadable": 0, "whole_files": 0}
+    for result in results:
+        for key, value in result.items():
+            totals[key] += value
+    return totals
+
+def parse_arguments(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Moves a job's chunks straight between world folders, without WorldEdit. "
+                                                 "Stop the server first: it must not have either world loaded.")
+    parser.add_argument("job_file", help="Saved job whose boxes and target paste origin describe the move.")
+    parser.add_argument("target_world_dir", help="Target world folder (the one holding level.dat and region/).")
+    parser.add_argument("--source-world-dir", help="Source world folder (default: the job's source_world_dir).")
+    parser.add_argument("-j", "--workers", type=int, default=None, metavar="N", help="Worker processes (default: one per CPU).")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be moved; do not touch the target world.")
+    parser.add_argument("--whole-columns", action="store_true",
+                        help="Allow boxes that do not cover whole chunk columns: every chunk they touch is moved whole, "
+                             "at full height, overwriting the target's blocks around the boxes too.")
+    parser.add_argument("--build-height", type=int, nargs=2, default=BUILD_HEIGHT, metavar=("MIN_Y", "MAX_Y"),
+                        help=f"Lowest and highest block Y of the worlds, which a box must span to cover whole chunk columns "
+                             f"(default: {BUILD_HEIGHT[0]} {BUILD_HEIGHT[1]}; the Nether, the End and pre-1.18 worlds use 0 255).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    try:
+        settings = load_batch_job_settings(args.job_file, load_default_settings(), {})
+        chunk_dx, chunk_dz = chunk_offset(settings)
+    except (OSError, ValueError) as e:
+        console.print(f"[{RICH_STYLES['error_text']}]Error: {e}[/]")
+        sys.exit(1)
+    source_world_dir = args.source_world_dir or settings['source_world_dir']
+    if not source_world_dir or not os.path.isdir(os.path.join(source_world_dir, "region")):
+        console.print(f"[{RICH_STYLES['error_text']}]Error: no region folder in source world folder '{source_world_dir}'. Pass --source-world-dir.[/]")
+        sys.exit(1)
+    if os.path.realpath(source_world_dir) == os.path.realpath(args.target_world_dir):
+        console.print(f"[{RICH_STYLES['error_text']}]Error: the source and target world folders must differ.[/]")
+        sys.exit(1)
+
+    tasks = plan_region_tasks(source_world_dir, args.target_world_dir, settings['source_bounding_boxes'], chunk_dx, chunk_dz)
+    chunk_count = sum(len(chunk_moves) for _, _, _, chunk_moves in tasks)
+    console.print(f"[{RICH_STYLES['plain_text']}]Moving {chunk_count} chunk columns by ({chunk_dx}, {chunk_dz}) chunks into {len(tasks)} target region files.[/]")
+    partial_boxes = boxes_not_covering_columns(settings['source_bounding_boxes'], args.build_height)
+    for bbox in partial_boxes:
+        console.print(f"[{RICH_STYLES['warning_text']}]Warning: box {bbox} does not cover whole chunk columns (X/Z on chunk borders, Y {args.build_height[0]} to {args.build_height[1]}); "
+                      f"the blocks around it in its chunks would be moved too.[/]")
+    whole_region_count = sum(1 for task in tasks if whole_region_source(task) is not None)
+    if whole_region_count:
+        console.print(f"[{RICH_STYLES['plain_text']}]{whole_region_count} region files are covered entirely and can be copied whole.[/]")
+    if args.dry_run:
+        return
+    if partial_boxes and not args.whole_columns:
+        console.print(f"[{RICH_STYLES['error_text']}]Error: refusing to overwrite target blocks outside the job's boxes. Pass --whole-columns to move whole chunk columns anyway.[/]")
+        sys.exit(1)
+    totals = run_chunk_transfer(tasks, args.workers)
+    console.print(f"[{RICH_STYLES['plain_text']}]Moved {totals['moved']} chunks ({totals['whole_files']} whole region files copied). {totals['missing']} were never "
+                  f"generated in the source and {totals['unreadable']} use a compression this tool cannot read; the target keeps its own chunks there.[/]")
+
+if __name__ == "__main__":
+    main()
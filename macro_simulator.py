@@ -0,0 +1,298 @@
+import argparse
+import json
+import math
+import sys
+
+from rich_main import (
+    CHUNK_SIZE,
+    DELAY_CATEGORIES,
+    RICH_STYLES,
+    TICKS_PER_SECOND,
+    box_volume,
+    build_settings,
+    console,
+    format_duration,
+    get_command_delay,
+    load_default_settings,
+)
+
+# --- Server Model ---
+# Modeled cost, in ticks, of the work each command makes the server do. These are rough defaults;
+# override them on the command line to match your server.
+DEFAULT_SERVER_MODEL = {
+    "world_switch_ticks": 60, # /mvtp into a different world (loading it and the spawn chunks)
+    "chunk_load_ticks": 20, # /tp outside the chunks already loaded around the player
+    "view_distance_blocks": 160, # /tp within this many blocks of the last position needs no chunk loading
+    "copy_ticks_per_million_blocks": 4,
+    "paste_ticks_per_million_blocks": 12,
+    "schematic_ticks_per_million_blocks": 6, # Writing or reading a //schem file on the server's disk
+}
+
+# Command category -> where its server time is reported
+TIME_BUCKETS = {"mvtp": "teleport", "tp": "teleport", "copy": "copy", "paste": "paste", "schematic": "schematic"}
+
+def classify_command(command_string):
+    """Returns the category of a macro message: "mvtp", "tp", "copy", "paste", "schematic", "forceload", "pos1", "pos2" or "none"."""
+    command_name = command_string.split(" ", 1)[0].lower()
+    return {
+        "/mvtp": "mvtp",
+        "/tp": "tp",
+        "//copy": "copy",
+        "//paste": "paste",
+        "//pos1": "pos1",
+        "//pos2": "pos2",
+        "//schem": "schematic",
+        "//schematic": "schematic",
+        "/forceload": "forceload",
+    }.get(command_name, "none")
+
+def parse_coordinates(command_string):
+    """Returns the integer coordinates after the command name, accepting '1 2 3' and '1,2,3' forms."""
+    arguments = command_string.split(" ", 1)[1] if " " in command_string else ""
+    return tuple(int(value) for value in arguments.replace(",", " ").split())
+
+def _selection_volume(selection):
+    """Returns the number of blocks between //pos1 and //pos2, or 0 while the selection is incomplete."""
+    if len(selection) != 2:
+        return 0
+    pos1, pos2 = selection["pos1"], selection["pos2"]
+    low = [min(a, b) for a, b in zip(pos1, pos2)]
+    high = [max(a, b) for a, b in zip(pos1, pos2)]
+    return box_volume(tuple(low) + tuple(high))
+
+def parse_schematic_command(command_string):
+    """Returns (action, name) for '//schem save [-f] <name>' or '//schem load <name>', or (None, None)."""
+    arguments = [word for word in command_string.split()[1:] if not word.startswith("-")]
+    if len(arguments) >= 2 and arguments[0].lower() in ("save", "load"):
+        return arguments[0].lower(), arguments[1]
+    return None, None
+
+def parse_forceload_command(command_string):
+    """
+    Returns (action, chunks) for '/forceload add|remove <x1> <z1> [<x2> <z2>]', with chunks the set of
+    (chunk_x, chunk_z) the block coordinates cover, or ("remove", None) for '/forceload remove all'.
+    Returns (None, None) for anything else, e.g. '/forceload query'.
+    """
+    arguments = command_string.split()[1:]
+    if not arguments or arguments[0].lower() not in ("add", "remove"):
+        return None, None
+    action = arguments[0].lower()
+    if action == "remove" and arguments[1:2] == ["all"]:
+        return action, None
+    coordinates = [int(value) for value in arguments[1:5]]
+    if len(coordinates) == 2:
+        coordinates *= 2
+    x1, z1, x2, z2 = (value // CHUNK_SIZE for value in coordinates)
+    return action, {(chunk_x, chunk_z) for chunk_x in range(min(x1, x2), max(x1, x2) + 1)
+                    for chunk_z in range(min(z1, z2), max(z1, z2) + 1)}
+
+def load_profile_messages(macro_config_path, profile_name=None):
+    """
+    Returns the (string, delayTicks) messages of a Macro Mod profile, all of its macros in order.
+    Without profile_name the config must hold exactly one profile.
+    """
+    with open(macro_config_path, 'r') as f:
+        macro_json_data = json.load(f)
+    profiles = macro_json_data.get("profiles", [])
+    if profile_name is None:
+        if len(profiles) != 1:
+            names = ", ".join(repr(profile.get("name")) for profile in profiles)
+            raise ValueError(f"'{macro_config_path}' holds {len(profiles)} profiles ({names}); pick one with --profile.")
+        profile = profiles[0]
+    else:
+        matching = [profile for profile in profiles if profile.get("name") == profile_name]
+        if not matching:
+            raise ValueError(f"No profile named '{profile_name}' in '{macro_config_path}'.")
+        profile = matching[0]
+    return [(message["string"], message.get("delayTicks", 0)) for macro in profile["macros"] for message in macro["messages"]]
+
+def load_command_file(commands_path, settings):
+    """
+    Returns the (string, delayTicks) messages for a plain text commands file, charging the delays a
+    Macro Mod profile generated with settings would carry (volume-scaled delays included).
+    """
+    messages = []
+    previous_command_category = "none"
+    previous_command_block_count = None
+    selection = {}
+    clipboard_blocks = 0
+    schematic_blocks = {} # Saved schematic name -> blocks in it
+    with open(commands_path, 'r') as f:
+        for line in f:
+            command_string = line.strip()
+            if not command_string:
+                continue
+            messages.append((command_string, get_command_delay(settings, previous_command_category, previous_command_block_count)))
+
+            command_category = classify_command(command_string)
+            if command_category in ("pos1", "pos2"):
+                selection[command_category] = parse_coordinates(command_string)
+                continue
+            if command_category == "copy":
+                clipboard_blocks = _selection_volume(selection)
+            elif command_category == "schematic":
+                action, name = parse_schematic_command(command_string)
+                if action == "save":
+                    schematic_blocks[name] = clipboard_blocks
+                elif action == "load":
+                    clipboard_blocks = schematic_blocks.get(name, 0)
+            if command_category in DELAY_CATEGORIES:
+                previous_command_category = command_category
+                previous_command_block_count = clipboard_blocks if command_category in ("copy", "paste") else None
+    return messages
+
+def simulate_playback(messages, server_model=DEFAULT_SERVER_MODEL):
+    """
+    Replays (string, delayTicks) messages against a modeled server with one main thread.
+    Macro Mod sends each message delayTicks after the previous one, whether or not the server has caught up;
+    the server runs commands one at a time, so a command sent while it is busy waits its turn.
+    Chunks force-loaded with /forceload stay loaded until removed, so a /tp into one of them costs no chunk loading.
+    Returns a dict of totals, all durations in ticks.
+    """
+    result = {
+        "commands": len(messages),
+        "send_ticks": 0, # When the macro sends its last message
+        "total_ticks": 0, # When the server finishes the last command
+        "busy_ticks": {"teleport": 0, "copy": 0, "paste": 0, "schematic": 0},
+        "idle_ticks": 0,
+        "queued_commands": 0,
+        "queued_ticks": 0,
+        "world_switches": 0,
+        "blocks_copied": 0,
+        "blocks_pasted": 0,
+    }
+    send_time = 0
+    server_free_at = 0
+    world = None
+    position = None
+    selection = {}
+    clipboard_blocks = 0
+    schematic_blocks = {} # Saved schematic name -> blocks in it
+    forceloaded_chunks = {} # World -> (chunk_x, chunk_z) force-loaded there
+
+    for command_string, delay_ticks in messages:
+        send_time += delay_ticks
+        command_category = classify_command(command_string)
+        service_ticks = 0
+
+        if command_category == "mvtp":
+            target_world = command_string.split(" ", 1)[1] if " " in command_string else None
+            if target_world != world:
+                service_ticks = server_model["world_switch_ticks"]
+                result["world_switches"] += 1
+                world = target_world
+            position = None # Multiverse drops the player at the world spawn
+        elif command_category == "tp":
+            destination = parse_coordinates(command_string)
+            destination_chunk = (destination[0] // CHUNK_SIZE, destination[2] // CHUNK_SIZE)
+            is_forceloaded = destination_chunk in forceloaded_chunks.get(world, ())
+            if not is_forceloaded and (position is None or math.dist(position, destination) > server_model["view_distance_blocks"]):
+                service_ticks = server_model["chunk_load_ticks"]
+            position = destination
+        elif command_category == "forceload":
+            # /forceload acts on the player's current world
+            action, chunks = parse_forceload_command(command_string)
+            if action == "add":
+                forceloaded_chunks.setdefault(world, set()).update(chunks)
+            elif action == "remove" and chunks is None:
+                forceloaded_chunks.pop(world, None)
+            elif action == "remove":
+                forceloaded_chunks.get(world, set()).difference_update(chunks)
+        elif command_category in ("pos1", "pos2"):
+            selection[command_category] = parse_coordinates(command_string)
+        elif command_category == "copy":
+            clipboard_blocks = _selection_volume(selection)
+            result["blocks_copied"] += clipboard_blocks
+            service_ticks = clipboard_blocks * server_model["copy_ticks_per_million_blocks"] / 1_000_000
+        elif command_category == "paste":
+            result["blocks_pasted"] += clipboard_blocks
+            service_ticks = clipboard_blocks * server_model["paste_ticks_per_million_blocks"] / 1_000_000
+        elif command_category == "schematic":
+            # //schem save keeps the clipboard; //schem load replaces it
+            action, name = parse_schematic_command(command_string)
+            if action == "save":
+                schematic_blocks[name] = clipboard_blocks
+            elif action == "load":
+                clipboard_blocks = schematic_blocks.get(name, 0)
+            service_ticks = clipboard_blocks * server_model["schematic_ticks_per_million_blocks"] / 1_000_000
+
+        start_time = max(send_time, server_free_at)
+        if start_time > send_time:
+            result["queued_commands"] += 1
+            result["queued_ticks"] += start_time - send_time
+        else:
+            result["idle_ticks"] += send_time - server_free_at
+        server_free_at = start_time + service_ticks
+        if command_category in TIME_BUCKETS:
+            result["busy_ticks"][TIME_BUCKETS[command_category]] += service_ticks
+
+    result["send_ticks"] = send_time
+    result["total_ticks"] = max(send_time, server_free_at)
+    return result
+
+def print_report(label, result):
+    """Prints one simulation result in a readable form."""
+    total_ticks = result["total_ticks"] or 1
+    total_seconds = result["total_ticks"] / TICKS_PER_SECOND
+    plain = RICH_STYLES['plain_text']
+    console.print(f"[{RICH_STYLES['input_label']}]{label}[/]")
+    console.print(f"[{plain}]  Commands:          {result['commands']}[/]")
+    console.print(f"[{plain}]  Run time:          {format_duration(total_seconds)} ({result['total_ticks']:.0f} ticks)[/]")
+    for bucket, ticks in result["busy_ticks"].items():
+        console.print(f"[{plain}]  Server {bucket + ':':<11} {ticks:10.0f} ticks ({100 * ticks / total_ticks:5.1f}%)[/]")
+    console.print(f"[{plain}]  Server idle:       {result['idle_ticks']:10.0f} ticks ({100 * result['idle_ticks'] / total_ticks:5.1f}%)[/]")
+    queued_style = RICH_STYLES['warning_text'] if result['queued_commands'] else plain
+    console.print(f"[{queued_style}]  Queued commands:   {result['queued_commands']} (waited {result['queued_ticks']:.0f} ticks; delays shorter than the work)[/]")
+    console.print(f"[{plain}]  World switches:    {result['world_switches']}[/]")
+    console.print(f"[{plain}]  Blocks pasted:     {result['blocks_pasted']}[/]")
+    if total_seconds:
+        console.print(f"[{plain}]  Throughput:        {result['blocks_pasted'] / total_seconds:,.0f} blocks/s[/]")
+
+def parse_arguments(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Replays generated macros against a modeled server to compare generation strategies offline.")
+    parser.add_argument("inputs", nargs="+", help="Macro Mod config JSON files and/or plain text commands files to simulate.")
+    parser.add_argument("--profile", help="Profile to replay from Macro Mod configs holding more than one.")
+    parser.add_argument("--settings", metavar="PATH",
+                        help="Settings or job JSON whose delays are charged to plain text commands files (default: settings.json).")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON instead of a report.")
+    for key, value in DEFAULT_SERVER_MODEL.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=float, default=value,
+                            help=f"Server model: {key.replace('_', ' ')} (default: {value}).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    server_model = {key: getattr(args, key) for key in DEFAULT_SERVER_MODEL}
+    console.quiet = True # Keep rich_main's settings messages out of the report
+    if args.settings:
+        with open(args.settings, 'r') as f:
+            settings = build_settings(json.load(f))
+    else:
+        settings = build_settings(load_default_settings())
+    console.quiet = False
+
+    results = {}
+    for input_path in args.inputs:
+        try:
+            if input_path.lower().endswith(".json"):
+                messages = load_profile_messages(input_path, args.profile)
+            else:
+                messages = load_command_file(input_path, settings)
+        except (OSError, ValueError, KeyError) as e:
+            console.print(f"[{RICH_STYLES['error_text']}]Error: could not read '{input_path}': {e}[/]")
+            sys.exit(1)
+        results[input_path] = simulate_playback(messages, server_model)
+
+    if args.json:
+        # Unstyled and unwrapped, so the output stays valid JSON
+        console.print(json.dumps(results, indent=2), markup=False, highlight=False, soft_wrap=True)
+        return
+    for input_path, result in results.items():
+        print_report(input_path, result)
+    if len(results) > 1:
+        fastest = min(results, key=lambda path: results[path]["total_ticks"])
+        console.print(f"[{RICH_STYLES['plain_text']}]Fastest: {fastest}[/]")
+
+if __name__ == "__main__":
+    main()
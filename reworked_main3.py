@@ -179,10 +179,20 @@ def get_bounding_boxes(existing_boxes=None):
         return existing_boxes
     return boxes
 
+def count_sub_regions(bbox, sub_region_size):
+    """
+    Returns how many sub-regions calculate_sub_regions will yield for a bounding box,
+    without generating any of them.
+    """
+    x1, y1, z1, x2, y2, z2 = bbox
+    dx = x2 - x1 + 1
+    dz = z2 - z1 + 1
+    return math.ceil(dx / sub_region_size) * math.ceil(dz / sub_region_size)
+
 def calculate_sub_regions(bbox, sub_region_size, target_origin_start, overall_src_min_coords):
     """
     Calculates sub-regions for a given bounding box and target origin.
-    Returns a list of (source_bbox, target_paste_coords) tuples.
+    Lazily yields (source_bbox, target_paste_coords) tuples.
     Uses overall_src_min_coords to maintain relative positioning across multiple bboxes.
     """
     x1, y1, z1, x2, y2, z2 = bbox
@@ -193,8 +203,6 @@ def calculate_sub_regions(bbox, sub_region_size, target_origin_start, overall_sr
 
     overall_min_x, overall_min_y, overall_min_z = overall_src_min_coords
 
-    sub_regions = []
-
     for i_x in range(0, dx, sub_region_size):
         for i_z in range(0, dz, sub_region_size):
             src_sub_x1 = x1 + i_x
@@ -210,11 +218,13 @@ def calculate_sub_regions(bbox, sub_region_size, target_origin_start, overall_sr
             target_paste_y = target_origin_start[1] + (src_sub_y1 - overall_min_y) # Apply Y offset too!
             target_paste_z = target_origin_start[2] + (src_sub_z1 - overall_min_z)
             
-            sub_regions.append(
-                ((src_sub_x1, src_sub_y1, src_sub_z1, src_sub_x2, src_sub_y2, src_sub_z2),
-                 (target_paste_x, target_paste_y, target_paste_z))
-            )
-    return sub_regions
+            yield ((src_sub_x1, src_sub_y1, src_sub_z1, src_sub_x2, src_sub_y2, src_sub_z2),
+                   (target_paste_x, target_paste_y, target_paste_z))
+
+def iter_all_sub_regions(bounding_boxes, sub_region_size, target_origin_start, overall_src_min_coords):
+    """Lazily yields the sub-regions of every bounding box, box by box."""
+    for bbox in bounding_boxes:
+        yield from calculate_sub_regions(bbox, sub_region_size, target_origin_start, overall_src_min_coords)
 
 def load_default_settings():
     """Loads default settings from SETTINGS_FILE."""
@@ -339,13 +349,8 @@ def main():
             
             overall_src_min_coords = (overall_min_x, overall_min_y, overall_min_z)
 
-        # Generate sub-regions using the new overall_src_min_coords
-        all_sub_regions = []
-        for bbox in settings['source_bounding_boxes']:
-            # Pass the overall_src_min_coords to calculate_sub_regions
-            all_sub_regions.extend(calculate_sub_regions(bbox, settings['sub_region_size'], settings['target_paste_origin'], overall_src_min_coords))
-        
-        total_sub_regions = len(all_sub_regions)
+        # Only count the sub-regions here; they are generated lazily during command emission
+        total_sub_regions = sum(count_sub_regions(bbox, settings['sub_region_size']) for bbox in settings['source_bounding_boxes'])
 
         # --- Review and Confirm ---
         display_header(header_type="review")
@@ -450,8 +455,8 @@ def main():
                 output_file_handle.close()
 
     sub_region_counter = 0
-    # No changes needed here, all_sub_regions is already populated correctly above
-    for i, (src_coords, target_coords) in enumerate(all_sub_regions):
+    all_sub_regions = iter_all_sub_regions(settings['source_bounding_boxes'], settings['sub_region_size'], settings['target_paste_origin'], overall_src_min_coords)
+    for src_coords, target_coords in all_sub_regions:
         sub_region_counter += 1
         print_write_and_json(f"# --- SUB-REGION {sub_region_counter} of {total_sub_regions} (Source: {src_coords[0]},{src_coords[1]},{src_coords[2]} to {src_coords[3]},{src_coords[4]},{src_coords[5]} -> Target: {target_coords[0]},{target_coords[1]},{target_coords[2]}) ---", "none")
         print_write_and_json(f"/mvtp {settings['source_world']}", "mvtp")
@@ -1,7 +1,13 @@
+import argparse
+import glob
 import math
 import os
 import json
+import re
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
 
 # Rich Imports
 from rich.console import Console
@@ -9,6 +15,14 @@ from rich.panel import Panel
 from rich.text import Text
 from rich import box
 
+from anvil_regions import find_air_tiles, find_surface_tops, trim_boxes
+
+# Optional NumPy import for the vectorized tiling engine
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # --- Global Rich Console ---
 console = Console()
 
@@ -53,6 +67,43 @@ RICH_STYLES = {
     "warning_text": "yellow"
 }
 
+# --- Planning Options ---
+TILING_ENGINES = ["python", "numpy"]
+TILE_SIZING_MODES = ["fixed", "adaptive"]
+OVERLAP_INDEX_CELL_SIZE = 512 # X/Z grid cell size (one region file) for the box overlap index
+TILE_ORDERS = ["row-major", "nearest"]
+ROUTE_TWO_OPT_WINDOW = 64 # How far ahead 2-opt looks for a segment to reverse
+ROUTE_TWO_OPT_PASSES = 8
+ROUTE_MAX_SEARCH_RING = 16 # Grid rings searched before nearest-neighbour falls back to a full scan
+CHUNK_SIZE = 16
+REGION_SIZE = 512 # Blocks per side of one r.X.Z.mca region file
+TILE_ALIGNMENTS = {"none": 0, "chunk": CHUNK_SIZE, "region": REGION_SIZE}
+
+# --- Macro Timing ---
+TICKS_PER_SECOND = 20 # Minecraft server tick rate, which Macro Mod delays are counted in
+JOB_COMPLETE_MESSAGE = "/say WorldEdit transfer job complete! All regions processed."
+# Command categories followed by a '<category>_delay'; other commands leave the pending delay unchanged
+DELAY_CATEGORIES = ["mvtp", "tp", "near_tp", "copy", "paste", "schematic", "forceload"]
+
+# --- Chunk Prefetching ---
+FORCELOAD_MAX_AREA = 256 # Most chunks one /forceload command accepts
+
+# --- Schematic Batching ---
+SCHEMATIC_NAME_PREFIX = "transfer_tile_" # Batch slot i is saved as transfer_tile_<i>, overwritten by every batch
+
+# --- Volume-Scaled Delays ---
+# Setting holding the per-block cost (ticks per million blocks) of each scalable command
+SCALED_DELAY_COSTS = {"copy": "copy_ticks_per_million_blocks", "paste": "paste_ticks_per_million_blocks"}
+
+# --- Macro Splitting ---
+MACRO_SPLIT_MODES = ["macros", "profiles"] # Where the parts of a split command list go
+MACRO_PART_SUFFIX_PATTERN = re.compile(r' \(part \d+ of \d+\)$') # Added to profile names in "profiles" mode
+
+# --- Macro Mod Config Scanning ---
+JSON_WHITESPACE_PATTERN = re.compile(r'[ \t\n\r]*')
+JSON_INNER_LINE_BREAK_PATTERN = re.compile(r'\n[ \t\n\r]*\S') # Any line break before the last value: an indented config
+MACRO_PROFILE_INDENT = "    " # Profiles sit two levels deep in an indent=2 config
+
 # --- Configuration File Paths ---
 SETTINGS_FILE = "settings.json"
 JOBS_DIR = "jobs"
@@ -243,10 +294,21 @@ def get_bounding_boxes(existing_boxes=None):
         return existing_boxes
     return boxes
 
+def count_sub_regions(bbox, sub_region_size):
+    """
+    Returns how many sub-regions calculate_sub_regions will yield for a bounding box,
+    without generating any of them.
+    """
+    x1, y1, z1, x2, y2, z2 = bbox
+    dx = x2 - x1 + 1
+    dz = z2 - z1 + 1
+    return math.ceil(dx / sub_region_size) * math.ceil(dz / sub_region_size)
+
 def calculate_sub_regions(bbox, sub_region_size, target_origin_start, overall_src_min_coords):
     """
     Calculates sub-regions for a given bounding box and target origin.
-    Returns a list of (source_bbox, target_paste_coords) tuples.
+    Lazily yields (source_bbox, target_paste_coords) tuples, so callers can stream them
+    instead of holding every tile of a large job in memory.
     Uses overall_src_min_coords to maintain relative positioning across multiple bboxes.
     """
     x1, y1, z1, x2, y2, z2 = bbox
@@ -258,8 +320,6 @@ def calculate_sub_regions(bbox, sub_region_size, target_origin_start, overall_sr
 
     overall_min_x, overall_min_y, overall_min_z = overall_src_min_coords
 
-    sub_regions = []
-
     for i_x in range(0, dx, sub_region_size):
         for i_z in range(0, dz, sub_region_size):
             src_sub_x1 = x1 + i_x
@@ -277,11 +337,555 @@ def calculate_sub_regions(bbox, sub_region_size, target_origin_start, overall_sr
             target_paste_y = target_origin_start[1] + (src_sub_y1 - overall_min_y) # Apply Y offset too!
             target_paste_z = target_origin_start[2] + (src_sub_z1 - overall_min_z)
             
-            sub_regions.append(
-                ((src_sub_x1, src_sub_y1, src_sub_z1, src_sub_x2, src_sub_y2, src_sub_z2),
-                 (target_paste_x, target_paste_y, target_paste_z))
-            )
-    return sub_regions
+            yield ((src_sub_x1, src_sub_y1, src_sub_z1, src_sub_x2, src_sub_y2, src_sub_z2),
+                   (target_paste_x, target_paste_y, target_paste_z))
+
+def get_volume_bounded_tile_size(bbox, sub_region_size, max_copy_volume):
+    """
+    Returns (size_x, size_y, size_z) tile dimensions for a bounding box so that no tile holds
+    more than max_copy_volume blocks. The X/Z edge is sub_region_size, shrunk if even a single
+    layer would be too big; the box is only split along Y when a full-height column is too big.
+    """
+    x1, y1, z1, x2, y2, z2 = bbox
+    dy = y2 - y1 + 1
+
+    size_xz = max(1, min(sub_region_size, math.isqrt(max_copy_volume)))
+    if size_xz * size_xz * dy <= max_copy_volume:
+        return (size_xz, dy, size_xz)
+    size_y = max(1, max_copy_volume // (size_xz * size_xz))
+    return (size_xz, size_y, size_xz)
+
+def _tile_edge_candidates(length):
+    """Returns every distinct tile edge that splits length into n equal-ish pieces, largest first."""
+    candidates = set()
+    pieces = 1
+    while pieces <= length:
+        edge = math.ceil(length / pieces)
+        candidates.add(edge)
+        # Jump straight to the smallest piece count that produces a shorter edge
+        pieces = max(pieces + 1, math.ceil(length / (edge - 1)) if edge > 1 else length + 1)
+    return sorted(candidates, reverse=True)
+
+def choose_adaptive_tile_size(bbox, block_budget):
+    """
+    Picks (size_x, size_y, size_z) tile dimensions for one bounding box that keep every tile at or
+    under block_budget blocks while producing as few tiles as possible. Thin walls end up as long
+    strips and tall towers as small full-height footprints. Ties go to the smaller tile volume.
+    """
+    x1, y1, z1, x2, y2, z2 = bbox
+    dx = x2 - x1 + 1
+    dy = y2 - y1 + 1
+    dz = z2 - z1 + 1
+
+    best_size = (1, 1, 1)
+    best_key = (dx * dy * dz, 1)
+    for size_y in _tile_edge_candidates(dy):
+        if size_y > block_budget:
+            continue
+        for size_x in _tile_edge_candidates(dx):
+            if size_x * size_y > block_budget:
+                continue
+            size_z = min(dz, block_budget // (size_x * size_y))
+            # Even out the Z pieces so the last strip is not a sliver
+            size_z = math.ceil(dz / math.ceil(dz / size_z))
+            tile_count = math.ceil(dx / size_x) * math.ceil(dy / size_y) * math.ceil(dz / size_z)
+            key = (tile_count, size_x * size_y * size_z)
+            if key < best_key:
+                best_key = key
+                best_size = (size_x, size_y, size_z)
+    return best_size
+
+def _axis_spans(start, end, size, alignment=0):
+    """
+    Yields inclusive (span_start, span_end) pieces of length size covering start..end.
+    With an alignment, cuts fall on absolute multiples of size (which get_tile_size keeps chunk- or
+    region-aligned), so only the first and last pieces can be partial leftovers.
+    """
+    if not alignment:
+        for span_start in range(start, end + 1, size):
+            yield (span_start, min(span_start + size - 1, end))
+        return
+    span_start = start
+    while span_start <= end:
+        span_end = min((span_start // size + 1) * size - 1, end)
+        yield (span_start, span_end)
+        span_start = span_end + 1
+
+def _count_axis_spans(start, end, size, alignment=0):
+    """Returns how many pieces _axis_spans yields, without generating them."""
+    if not alignment:
+        return math.ceil((end - start + 1) / size)
+    return end // size - start // size + 1
+
+def count_sub_regions_3d(bbox, tile_size, alignment=0):
+    """Returns how many sub-regions calculate_sub_regions_3d will yield, without generating them."""
+    x1, y1, z1, x2, y2, z2 = bbox
+    size_x, size_y, size_z = tile_size
+    return (_count_axis_spans(x1, x2, size_x, alignment) *
+            _count_axis_spans(y1, y2, size_y) *
+            _count_axis_spans(z1, z2, size_z, alignment))
+
+def calculate_sub_regions_3d(bbox, tile_size, target_origin_start, overall_src_min_coords, alignment=0):
+    """
+    Like calculate_sub_regions, but tiles all three axes using tile_size = (size_x, size_y, size_z).
+    Lazily yields (source_bbox, target_paste_coords) tuples. The Y slabs of one X/Z column are
+    yielded bottom-up and back to back, so the player stays over the same spot.
+    With an alignment (16 for chunks, 512 for region files), X/Z cuts snap to absolute multiples of the tile size.
+    """
+    x1, y1, z1, x2, y2, z2 = bbox
+    size_x, size_y, size_z = tile_size
+
+    overall_min_x, overall_min_y, overall_min_z = overall_src_min_coords
+
+    for src_sub_x1, src_sub_x2 in _axis_spans(x1, x2, size_x, alignment):
+        for src_sub_z1, src_sub_z2 in _axis_spans(z1, z2, size_z, alignment):
+            for src_sub_y1, src_sub_y2 in _axis_spans(y1, y2, size_y):
+                # Same offset rule as calculate_sub_regions, now applied to every axis
+                target_paste_x = target_origin_start[0] + (src_sub_x1 - overall_min_x)
+                target_paste_y = target_origin_start[1] + (src_sub_y1 - overall_min_y)
+                target_paste_z = target_origin_start[2] + (src_sub_z1 - overall_min_z)
+
+                yield ((src_sub_x1, src_sub_y1, src_sub_z1, src_sub_x2, src_sub_y2, src_sub_z2),
+                       (target_paste_x, target_paste_y, target_paste_z))
+
+def calculate_overall_min_coords(bounding_boxes):
+    """
+    Returns the (x, y, z) minimum corner across all bounding boxes.
+    This is the anchor that every box's target paste position is measured from.
+    """
+    if not bounding_boxes:
+        return (0, 0, 0) # Default if no boxes, though get_bounding_boxes ensures at least one
+    return (min(bbox[0] for bbox in bounding_boxes),
+            min(bbox[1] for bbox in bounding_boxes),
+            min(bbox[2] for bbox in bounding_boxes))
+
+def iter_all_sub_regions(bounding_boxes, sub_region_size, target_origin_start, overall_src_min_coords):
+    """Lazily yields the sub-regions of every bounding box, box by box, in row-major order."""
+    for bbox in bounding_boxes:
+        yield from calculate_sub_regions(bbox, sub_region_size, target_origin_start, overall_src_min_coords)
+
+def count_all_sub_regions(bounding_boxes, sub_region_size):
+    """Returns the total sub-region count for all bounding boxes without materializing them."""
+    return sum(count_sub_regions(bbox, sub_region_size) for bbox in bounding_boxes)
+
+def calculate_sub_regions_array(bounding_boxes, sub_region_size, target_origin_start, overall_src_min_coords):
+    """
+    Vectorized NumPy version of iter_all_sub_regions for jobs with thousands of boxes.
+    Returns an (N, 9) int64 array, one row per sub-region: source x1,y1,z1,x2,y2,z2 then target x,y,z.
+    Rows come out in exactly the same order as iter_all_sub_regions.
+    """
+    if np is None:
+        raise ImportError("The 'numpy' tiling engine requires NumPy (pip install numpy).")
+
+    boxes = np.asarray(bounding_boxes, dtype=np.int64).reshape(-1, 6)
+    x1, y1, z1, x2, y2, z2 = boxes.T
+
+    # Number of tiles along X and Z for every box (ceiling division)
+    tiles_x = (x2 - x1 + sub_region_size) // sub_region_size
+    tiles_z = (z2 - z1 + sub_region_size) // sub_region_size
+    tiles_per_box = tiles_x * tiles_z
+
+    # Map every output row back to its box, then to its (i_x, i_z) step inside that box
+    box_index = np.repeat(np.arange(len(boxes)), tiles_per_box)
+    first_row_of_box = np.cumsum(tiles_per_box) - tiles_per_box
+    row_in_box = np.arange(int(tiles_per_box.sum())) - first_row_of_box[box_index]
+    step_x = row_in_box // tiles_z[box_index]
+    step_z = row_in_box % tiles_z[box_index]
+
+    src_x1 = x1[box_index] + step_x * sub_region_size
+    src_z1 = z1[box_index] + step_z * sub_region_size
+    src_x2 = np.minimum(src_x1 + sub_region_size - 1, x2[box_index])
+    src_z2 = np.minimum(src_z1 + sub_region_size - 1, z2[box_index])
+    src_y1 = y1[box_index]
+    src_y2 = y2[box_index]
+
+    overall_min_x, overall_min_y, overall_min_z = overall_src_min_coords
+    target_x = target_origin_start[0] + (src_x1 - overall_min_x)
+    target_y = target_origin_start[1] + (src_y1 - overall_min_y)
+    target_z = target_origin_start[2] + (src_z1 - overall_min_z)
+
+    return np.stack([src_x1, src_y1, src_z1, src_x2, src_y2, src_z2, target_x, target_y, target_z], axis=1)
+
+def iter_sub_region_rows(sub_region_array):
+    """
+    Returns an iterator of (source_bbox, target_paste_coords) tuples from a calculate_sub_regions_array result.
+    The array is converted column by column and the tuples are built by zip in C; slicing every row in Python
+    cost more than the vectorized planning saved.
+    """
+    source_columns = sub_region_array[:, :6].T.tolist()
+    target_columns = sub_region_array[:, 6:].T.tolist()
+    return zip(zip(*source_columns), zip(*target_columns))
+
+def box_volume(bbox):
+    """Returns the number of blocks inside an inclusive (x1,y1,z1,x2,y2,z2) bounding box."""
+    return (bbox[3] - bbox[0] + 1) * (bbox[4] - bbox[1] + 1) * (bbox[5] - bbox[2] + 1)
+
+def box_intersection(box_a, box_b):
+    """Returns the overlapping part of two bounding boxes, or None if they do not overlap."""
+    x1, y1, z1 = max(box_a[0], box_b[0]), max(box_a[1], box_b[1]), max(box_a[2], box_b[2])
+    x2, y2, z2 = min(box_a[3], box_b[3]), min(box_a[4], box_b[4]), min(box_a[5], box_b[5])
+    if x1 > x2 or y1 > y2 or z1 > z2:
+        return None
+    return (x1, y1, z1, x2, y2, z2)
+
+def subtract_box(bbox, cutter):
+    """
+    Returns a list of disjoint boxes covering bbox minus cutter (at most 6 pieces).
+    Pieces are cut as full-size X slabs first, then Z, then Y, to keep them as large as possible.
+    """
+    overlap = box_intersection(bbox, cutter)
+    if overlap is None:
+        return [bbox]
+
+    x1, y1, z1, x2, y2, z2 = bbox
+    ox1, oy1, oz1, ox2, oy2, oz2 = overlap
+    pieces = []
+    if x1 < ox1:
+        pieces.append((x1, y1, z1, ox1 - 1, y2, z2))
+    if ox2 < x2:
+        pieces.append((ox2 + 1, y1, z1, x2, y2, z2))
+    if z1 < oz1:
+        pieces.append((ox1, y1, z1, ox2, y2, oz1 - 1))
+    if oz2 < z2:
+        pieces.append((ox1, y1, oz2 + 1, ox2, y2, z2))
+    if y1 < oy1:
+        pieces.append((ox1, y1, oz1, ox2, oy1 - 1, oz2))
+    if oy2 < y2:
+        pieces.append((ox1, oy2 + 1, oz1, ox2, y2, oz2))
+    return pieces
+
+def find_box_overlaps(bounding_boxes):
+    """
+    Finds every pair of overlapping bounding boxes with a sweep along X.
+    Returns a list of (index_a, index_b, overlapping_block_count) tuples.
+    """
+    order = sorted(range(len(bounding_boxes)), key=lambda i: bounding_boxes[i][0])
+    active = [] # Indices of boxes whose X range still reaches the sweep position
+    overlaps = []
+    for i in order:
+        bbox = bounding_boxes[i]
+        active = [j for j in active if bounding_boxes[j][3] >= bbox[0]]
+        for j in active:
+            overlap = box_intersection(bounding_boxes[j], bbox)
+            if overlap is not None:
+                overlaps.append((min(i, j), max(i, j), box_volume(overlap)))
+        active.append(i)
+    return sorted(overlaps)
+
+def _grid_cells(bbox, cell_size):
+    """Yields every (cell_x, cell_z) X/Z grid cell that a bounding box touches."""
+    for cell_x in range(bbox[0] // cell_size, bbox[3] // cell_size + 1):
+        for cell_z in range(bbox[2] // cell_size, bbox[5] // cell_size + 1):
+            yield (cell_x, cell_z)
+
+def remove_box_overlaps(bounding_boxes):
+    """
+    Splits a list of possibly overlapping bounding boxes into disjoint cuboids covering the same blocks.
+    Earlier boxes keep their shape; later boxes lose whatever an earlier box already covers.
+    Candidate overlaps are looked up through an X/Z grid index instead of comparing every pair.
+    """
+    disjoint_boxes = []
+    grid_index = {} # (cell_x, cell_z) -> indices into disjoint_boxes
+    for bbox in bounding_boxes:
+        candidates = set()
+        for cell in _grid_cells(bbox, OVERLAP_INDEX_CELL_SIZE):
+            candidates.update(grid_index.get(cell, ()))
+
+        pieces = [bbox]
+        for idx in sorted(candidates):
+            pieces = [piece for remaining in pieces for piece in subtract_box(remaining, disjoint_boxes[idx])]
+            if not pieces:
+                break
+
+        for piece in pieces:
+            for cell in _grid_cells(piece, OVERLAP_INDEX_CELL_SIZE):
+                grid_index.setdefault(cell, []).append(len(disjoint_boxes))
+            disjoint_boxes.append(piece)
+    return disjoint_boxes
+
+def merge_adjacent_boxes(bounding_boxes):
+    """
+    Merges bounding boxes that touch (or overlap) across a full shared face into larger cuboids.
+    Two boxes are only merged when their union is exactly a cuboid, so no extra blocks are ever added.
+    Boxes are grouped by their cross-section on the other two axes and swept along each axis in turn,
+    repeating until nothing else merges.
+    """
+    boxes = list(bounding_boxes)
+    merged_any = True
+    while merged_any:
+        merged_any = False
+        for axis in range(3):
+            other_axes = [a for a in range(3) if a != axis]
+            groups = {} # Cross-section on the other two axes -> boxes sharing it
+            for bbox in boxes:
+                key = tuple(bbox[a] for a in other_axes) + tuple(bbox[a + 3] for a in other_axes)
+                groups.setdefault(key, []).append(bbox)
+
+            boxes = []
+            for group in groups.values():
+                group.sort(key=lambda bbox: bbox[axis])
+                current = list(group[0])
+                for bbox in group[1:]:
+                    if bbox[axis] <= current[axis + 3] + 1: # Touching or overlapping along this axis
+                        current[axis + 3] = max(current[axis + 3], bbox[axis + 3])
+                        merged_any = True
+                    else:
+                        boxes.append(tuple(current))
+                        current = list(bbox)
+                boxes.append(tuple(current))
+    return boxes
+
+def prepare_bounding_boxes(settings):
+    """
+    Returns the bounding boxes that should actually be tiled for the job,
+    after the optional overlap removal and adjacent-box merging passes.
+    """
+    bounding_boxes = list(settings['source_bounding_boxes'])
+    if settings.get('remove_overlaps'):
+        bounding_boxes = remove_box_overlaps(bounding_boxes)
+    if settings.get('merge_boxes'):
+        bounding_boxes = merge_adjacent_boxes(bounding_boxes)
+    return bounding_boxes
+
+def align_tile_edge(size, alignment):
+    """
+    Rounds an X/Z tile edge so that cuts at its multiples land on alignment boundaries.
+    Edges of at least one alignment cell round down to a whole number of cells; smaller edges round
+    down to a chunk multiple that evenly divides the alignment (never below one chunk).
+    """
+    if size >= alignment:
+        return size // alignment * alignment
+    edge = alignment
+    while edge > CHUNK_SIZE and edge > size:
+        edge //= 2
+    return max(CHUNK_SIZE, edge)
+
+def get_tile_size(bbox, settings):
+    """
+    Returns the (size_x, size_y, size_z) tile dimensions for a bounding box under the current settings:
+    adaptive or volume-bounded when max_copy_volume is set, otherwise sub_region_size over the full box height.
+    X/Z edges are snapped with align_tile_edge when a tile alignment is selected, then shrunk to the next
+    aligned edge while a single layer still exceeds max_copy_volume. Raises ValueError if even a one-chunk,
+    one-block-tall tile does not fit.
+    """
+    max_copy_volume = settings.get('max_copy_volume')
+    if not max_copy_volume:
+        tile_size = (settings['sub_region_size'], bbox[4] - bbox[1] + 1, settings['sub_region_size'])
+    elif settings.get('tile_sizing') == "adaptive":
+        tile_size = choose_adaptive_tile_size(bbox, max_copy_volume)
+    else:
+        tile_size = get_volume_bounded_tile_size(bbox, settings['sub_region_size'], max_copy_volume)
+
+    alignment = TILE_ALIGNMENTS.get(settings.get('tile_alignment'), 0)
+    if alignment:
+        size_x = align_tile_edge(tile_size[0], alignment)
+        size_z = align_tile_edge(tile_size[2], alignment)
+        size_y = tile_size[1]
+        if max_copy_volume:
+            # Rounding up to a chunk can push one layer over the limit; step X, then Z, down to the next aligned edge
+            while size_x * size_z > max_copy_volume and size_x > CHUNK_SIZE:
+                size_x = align_tile_edge(size_x - CHUNK_SIZE, alignment)
+            while size_x * size_z > max_copy_volume and size_z > CHUNK_SIZE:
+                size_z = align_tile_edge(size_z - CHUNK_SIZE, alignment)
+            if size_x * size_z > max_copy_volume:
+                raise ValueError(f"A tile alignment needs a max copy volume of at least {CHUNK_SIZE * CHUNK_SIZE} blocks (got {max_copy_volume}).")
+            size_y = min(size_y, max_copy_volume // (size_x * size_z))
+        tile_size = (size_x, size_y, size_z)
+    return tile_size
+
+def plan_sub_regions(settings, bounding_boxes, overall_src_min_coords):
+    """
+    Returns an iterator over every (source_bbox, target_paste_coords) pair for the given
+    bounding boxes (usually from prepare_bounding_boxes). With a max_copy_volume or a tile alignment set,
+    boxes go through calculate_sub_regions_3d using get_tile_size; otherwise the tiling engine
+    selected in settings is used, falling back to the Python engine if NumPy is missing.
+    """
+    alignment = TILE_ALIGNMENTS.get(settings.get('tile_alignment'), 0)
+    if settings.get('max_copy_volume') or alignment:
+        return (sub_region
+                for bbox in bounding_boxes
+                for sub_region in calculate_sub_regions_3d(bbox, get_tile_size(bbox, settings), settings['target_paste_origin'], overall_src_min_coords, alignment))
+    if settings.get('tiling_engine') == "numpy":
+        if np is not None:
+            sub_region_array = calculate_sub_regions_array(bounding_boxes, settings['sub_region_size'], settings['target_paste_origin'], overall_src_min_coords)
+            return iter_sub_region_rows(sub_region_array)
+        console.print(f"[{RICH_STYLES['warning_text']}]NumPy is not installed. Falling back to the 'python' tiling engine.[/]")
+    return iter_all_sub_regions(bounding_boxes, settings['sub_region_size'], settings['target_paste_origin'], overall_src_min_coords)
+
+def count_planned_sub_regions(settings, bounding_boxes):
+    """Returns how many sub-regions plan_sub_regions will produce for the boxes, without generating them."""
+    alignment = TILE_ALIGNMENTS.get(settings.get('tile_alignment'), 0)
+    if settings.get('max_copy_volume') or alignment:
+        return sum(count_sub_regions_3d(bbox, get_tile_size(bbox, settings), alignment) for bbox in bounding_boxes)
+    return count_all_sub_regions(bounding_boxes, settings['sub_region_size'])
+
+def drop_air_sub_regions(settings, sub_regions):
+    """Drops the sub-regions that hold only air in the source world. Returns (kept_sub_regions, skipped_count)."""
+    air_tiles = find_air_tiles(settings['source_world_dir'], [src_coords for src_coords, _ in sub_regions])
+    return [sub_region for index, sub_region in enumerate(sub_regions) if index not in air_tiles], len(air_tiles)
+
+def lower_sub_regions_to_surface(settings, sub_regions):
+    """
+    Lowers each sub-region's top (y2) to the highest non-air block in its columns, read from the source world's
+    chunk heightmaps. Tiles entirely above the surface are dropped; tiles over chunks without a heightmap are kept.
+    Returns (sub_regions, lowered_count, dropped_count).
+    """
+    surface_tops = find_surface_tops(settings['source_world_dir'], [src_coords for src_coords, _ in sub_regions])
+    kept_sub_regions = []
+    lowered_count = dropped_count = 0
+    for (src_coords, target_coords), surface_top in zip(sub_regions, surface_tops):
+        if surface_top is not None and surface_top < src_coords[1]:
+            dropped_count += 1
+            continue
+        if surface_top is not None and surface_top < src_coords[4]:
+            src_coords = tuple(src_coords[:4]) + (surface_top, src_coords[5])
+            lowered_count += 1
+        kept_sub_regions.append((src_coords, target_coords))
+    return kept_sub_regions, lowered_count, dropped_count
+
+# Last source-world scan: (key, kept_sub_regions, skipped_count, lowered_count). Review screen redraws and the
+# generation that follows plan the same tiles, so they reuse it instead of rereading the region files.
+_source_world_scan = (None, None, 0, 0)
+
+def apply_source_world_scans(settings, sub_regions, stats):
+    """
+    Runs the source-world passes turned on in settings over the planned sub-regions: skip_air_tiles drops all-air
+    tiles and heightmap_trim lowers tile tops to the terrain surface. Adds skipped_air_tiles and lowered_tiles
+    to stats and returns the remaining sub-regions as a list. If the world has no region folder, nothing changes.
+    The result is reused while the world folder, the passes and the planned sub-regions stay the same.
+    """
+    global _source_world_scan
+    sub_regions = [(tuple(src_coords), tuple(target_coords)) for src_coords, target_coords in sub_regions]
+    world_dir = settings['source_world_dir']
+    if not world_dir or not os.path.isdir(os.path.join(world_dir, "region")):
+        console.print(f"[{RICH_STYLES['warning_text']}]No region folder found in source world folder '{world_dir}'. Not skipping or trimming any sub-regions.[/]")
+        return sub_regions
+    scan_key = (os.path.realpath(world_dir), settings['skip_air_tiles'], settings['heightmap_trim'], tuple(sub_regions))
+    if _source_world_scan[0] != scan_key:
+        skipped_count = lowered_count = 0
+        if settings['skip_air_tiles']:
+            sub_regions, skipped_count = drop_air_sub_regions(settings, sub_regions)
+        if settings['heightmap_trim']:
+            sub_regions, lowered_count, dropped_count = lower_sub_regions_to_surface(settings, sub_regions)
+            skipped_count += dropped_count
+        _source_world_scan = (scan_key, sub_regions, skipped_count, lowered_count)
+    _, kept_sub_regions, skipped_count, lowered_count = _source_world_scan
+    stats["skipped_air_tiles"] += skipped_count
+    stats["lowered_tiles"] += lowered_count
+    return list(kept_sub_regions)
+
+def trim_bounding_boxes(settings):
+    """
+    Shrinks each source box to the tightest box around its non-air blocks in settings['source_world_dir'].
+    Returns (trimmed_boxes, target_paste_origin): boxes holding only air are dropped, and the target origin
+    moves with the boxes' minimum corner so every block still lands where it did before trimming.
+    """
+    trimmed_boxes = [bbox for bbox in trim_boxes(settings['source_world_dir'], settings['source_bounding_boxes']) if bbox is not None]
+    if not trimmed_boxes:
+        return [], settings['target_paste_origin']
+    old_min = calculate_overall_min_coords(settings['source_bounding_boxes'])
+    new_min = calculate_overall_min_coords(trimmed_boxes)
+    return trimmed_boxes, tuple(origin + new - old for origin, new, old in zip(settings['target_paste_origin'], new_min, old_min))
+
+def _tile_position(sub_region):
+    """Returns the (x, z) spot the player teleports to for a sub-region in the source world."""
+    src_coords = sub_region[0]
+    return (src_coords[0], src_coords[2])
+
+def route_length(sub_regions):
+    """
+    Returns the total X/Z teleport distance (in blocks) of visiting the sub-regions in the given order.
+    Target positions keep the same offset from their source, so one world's path length covers both.
+    """
+    positions = [_tile_position(sub_region) for sub_region in sub_regions]
+    return sum(math.dist(positions[i], positions[i + 1]) for i in range(len(positions) - 1))
+
+def _ring_cells(cell_x, cell_z, ring):
+    """Yields the grid cells on the square ring at Chebyshev distance ring around (cell_x, cell_z)."""
+    if ring == 0:
+        yield (cell_x, cell_z)
+        return
+    for offset in range(-ring, ring + 1):
+        yield (cell_x + offset, cell_z - ring)
+        yield (cell_x + offset, cell_z + ring)
+    for offset in range(-ring + 1, ring):
+        yield (cell_x - ring, cell_z + offset)
+        yield (cell_x + ring, cell_z + offset)
+
+def _nearest_neighbour_route(positions, cell_size):
+    """Builds a route with nearest-neighbour hops, starting at the first position, using a grid to find neighbours."""
+    grid = {} # (cell_x, cell_z) -> set of unvisited indices
+    for i, (x, z) in enumerate(positions):
+        grid.setdefault((x // cell_size, z // cell_size), set()).add(i)
+
+    def take(i):
+        x, z = positions[i]
+        cell = (x // cell_size, z // cell_size)
+        grid[cell].discard(i)
+        if not grid[cell]:
+            del grid[cell]
+
+    route = [0]
+    take(0)
+    while grid:
+        x, z = positions[route[-1]]
+        cell_x, cell_z = x // cell_size, z // cell_size
+        best_index, best_distance = None, None
+        ring = 0
+        while ring <= ROUTE_MAX_SEARCH_RING:
+            # Anything in this ring is at least (ring - 1) cells away, so stop once that can't beat the best
+            if best_distance is not None and (ring - 1) * cell_size > best_distance:
+                break
+            for cell in _ring_cells(cell_x, cell_z, ring):
+                for i in grid.get(cell, ()):
+                    distance = math.dist((x, z), positions[i])
+                    if best_distance is None or (distance, i) < (best_distance, best_index):
+                        best_index, best_distance = i, distance
+            ring += 1
+        if best_index is None or ring > ROUTE_MAX_SEARCH_RING:
+            # Remaining tiles are far away (or the ring search was cut short); scan them all
+            remaining = [i for cell_indices in grid.values() for i in cell_indices]
+            best_index = min(remaining, key=lambda i: (math.dist((x, z), positions[i]), i))
+        route.append(best_index)
+        take(best_index)
+    return route
+
+def _two_opt(route, positions):
+    """Improves an open route in place by reversing segments (windowed 2-opt) while that shortens it."""
+    def distance(a, b):
+        return math.dist(positions[route[a]], positions[route[b]])
+
+    for _ in range(ROUTE_TWO_OPT_PASSES):
+        improved = False
+        for i in range(len(route) - 2):
+            for j in range(i + 2, min(len(route), i + ROUTE_TWO_OPT_WINDOW)):
+                # Reversing route[i+1..j] swaps edges (i, i+1) and (j, j+1); the last stop has no outgoing edge
+                before = distance(i, i + 1)
+                after = distance(i, j)
+                if j + 1 < len(route):
+                    before += distance(j, j + 1)
+                    after += distance(i + 1, j + 1)
+                if after < before - 1e-9:
+                    route[i + 1:j + 1] = reversed(route[i + 1:j + 1])
+                    improved = True
+        if not improved:
+            break
+    return route
+
+def order_sub_regions_for_travel(sub_regions):
+    """
+    Reorders sub-regions to shorten the total teleport distance, starting from the first sub-region.
+    Uses nearest-neighbour hops followed by a windowed 2-opt pass. Returns a new list.
+    """
+    sub_regions = list(sub_regions)
+    if len(sub_regions) < 3:
+        return sub_regions
+    positions = [_tile_position(sub_region) for sub_region in sub_regions]
+    # Size the search grid to roughly one tile, so neighbours usually sit in the adjacent cells
+    cell_size = max(1, round(sum(src[3] - src[0] + 1 for src, _ in sub_regions) / len(sub_regions)))
+    route = _nearest_neighbour_route(positions, cell_size)
+    route = _two_opt(route, positions)
+    return [sub_regions[i] for i in route]
 
 def load_default_settings():
     """Loads default settings from SETTINGS_FILE."""
@@ -312,9 +916,34 @@ def save_default_settings(current_settings):
         'tp_delay': current_settings.get('tp_delay'),
         'copy_delay': current_settings.get('copy_delay'),
         'paste_delay': current_settings.get('paste_delay'),
+        'volume_scaled_delays': current_settings.get('volume_scaled_delays'),
+        'copy_ticks_per_million_blocks': current_settings.get('copy_ticks_per_million_blocks'),
+        'paste_ticks_per_million_blocks': current_settings.get('paste_ticks_per_million_blocks'),
+        'min_scaled_delay': current_settings.get('min_scaled_delay'),
+        'schematic_batch_size': current_settings.get('schematic_batch_size'),
+        'schematic_delay': current_settings.get('schematic_delay'),
+        'shorten_near_tp_delays': current_settings.get('shorten_near_tp_delays'),
+        'view_distance_blocks': current_settings.get('view_distance_blocks'),
+        'near_tp_delay': current_settings.get('near_tp_delay'),
+        'prefetch_chunks': current_settings.get('prefetch_chunks'),
+        'max_forceloaded_chunks': current_settings.get('max_forceloaded_chunks'),
+        'forceload_delay': current_settings.get('forceload_delay'),
+        'skip_air_tiles': current_settings.get('skip_air_tiles'),
+        'source_world_dir': current_settings.get('source_world_dir'),
+        'heightmap_trim': current_settings.get('heightmap_trim'),
         'generate_json': current_settings.get('generate_json'),
         'json_filename': current_settings.get('json_filename'),
-        'dry_run': current_settings.get('dry_run')
+        'dry_run': current_settings.get('dry_run'),
+        'tiling_engine': current_settings.get('tiling_engine'),
+        'max_copy_volume': current_settings.get('max_copy_volume'),
+        'tile_sizing': current_settings.get('tile_sizing'),
+        'remove_overlaps': current_settings.get('remove_overlaps'),
+        'merge_boxes': current_settings.get('merge_boxes'),
+        'tile_order': current_settings.get('tile_order'),
+        'tile_alignment': current_settings.get('tile_alignment'),
+        'compact_json': current_settings.get('compact_json'),
+        'max_macro_messages': current_settings.get('max_macro_messages'),
+        'macro_split_mode': current_settings.get('macro_split_mode')
     }
     try:
         with open(SETTINGS_FILE, 'w') as f:
@@ -381,6 +1010,27 @@ def save_current_job(current_settings):
     except IOError as e:
         console.print(f"[{RICH_STYLES['error_text']}]ERROR: Could not save job '{job_name}': {e}[/]")
 
+def normalize_job_settings(loaded_settings):
+    """Converts the JSON lists of a loaded job back to tuples for bounding boxes and target origin."""
+    if 'source_bounding_boxes' in loaded_settings and loaded_settings['source_bounding_boxes'] is not None:
+        loaded_settings['source_bounding_boxes'] = [tuple(box) for box in loaded_settings['source_bounding_boxes']]
+    else:
+        loaded_settings['source_bounding_boxes'] = [] # Ensure it's a list if missing or null
+
+    if 'target_paste_origin' in loaded_settings and loaded_settings['target_paste_origin'] is not None:
+        loaded_settings['target_paste_origin'] = tuple(loaded_settings['target_paste_origin'])
+    else:
+        loaded_settings['target_paste_origin'] = (0,0,0) # Default if missing or null
+
+    if 'optimize_commands' in loaded_settings: # Jobs saved before the option was renamed
+        loaded_settings.setdefault('shorten_near_tp_delays', loaded_settings.pop('optimize_commands'))
+    return loaded_settings
+
+def load_job_file(job_file_path):
+    """Reads a saved job file and returns its settings. Raises FileNotFoundError / json.JSONDecodeError."""
+    with open(job_file_path, 'r') as f:
+        return normalize_job_settings(json.load(f))
+
 def load_selected_job():
     """Prompts user to select and load an existing job."""
     available_jobs = list_available_jobs()
@@ -405,19 +1055,7 @@ def load_selected_job():
                 job_name = available_jobs[job_idx]
                 job_file_path = os.path.join(JOBS_DIR, f"{job_name}.json")
                 
-                with open(job_file_path, 'r') as f:
-                    loaded_settings = json.load(f)
-                
-                # Convert lists back to tuples for bounding boxes and target origin
-                if 'source_bounding_boxes' in loaded_settings and loaded_settings['source_bounding_boxes'] is not None:
-                    loaded_settings['source_bounding_boxes'] = [tuple(box) for box in loaded_settings['source_bounding_boxes']]
-                else:
-                    loaded_settings['source_bounding_boxes'] = [] # Ensure it's a list if missing or null
-                
-                if 'target_paste_origin' in loaded_settings and loaded_settings['target_paste_origin'] is not None:
-                    loaded_settings['target_paste_origin'] = tuple(loaded_settings['target_paste_origin'])
-                else:
-                    loaded_settings['target_paste_origin'] = (0,0,0) # Default if missing or null
+                loaded_settings = load_job_file(job_file_path)
 
                 console.print(f"[{RICH_STYLES['plain_text']}]Job '{job_name}' loaded successfully.[/]")
                 return loaded_settings
@@ -436,15 +1074,9 @@ def load_selected_job():
             console.print(f"[{RICH_STYLES['error_text']}]An unexpected error occurred while loading job: {e}[/]")
             return None
 
-def main():
-    # Ensure jobs directory exists
-    _ensure_jobs_dir_exists()
-
-    # Load default settings from settings.json
-    loaded_defaults = load_default_settings()
-
-    # Initialize settings with loaded defaults or hardcoded defaults
-    settings = {
+def build_settings(loaded_defaults):
+    """Returns a full settings dict, using loaded defaults where present and hardcoded defaults otherwise."""
+    return {
         'source_world': loaded_defaults.get('source_world'),
         'target_world': loaded_defaults.get('target_world'),
         'creative_mode': loaded_defaults.get('creative_mode', True),
@@ -457,10 +1089,921 @@ def main():
         'tp_delay': loaded_defaults.get('tp_delay', 15),
         'copy_delay': loaded_defaults.get('copy_delay', 50),
         'paste_delay': loaded_defaults.get('paste_delay', 100),
+        'volume_scaled_delays': loaded_defaults.get('volume_scaled_delays', False),
+        'copy_ticks_per_million_blocks': loaded_defaults.get('copy_ticks_per_million_blocks', 5),
+        'paste_ticks_per_million_blocks': loaded_defaults.get('paste_ticks_per_million_blocks', 10),
+        'min_scaled_delay': loaded_defaults.get('min_scaled_delay', 5),
+        'schematic_batch_size': loaded_defaults.get('schematic_batch_size', 0),
+        'schematic_delay': loaded_defaults.get('schematic_delay', 20),
+        'shorten_near_tp_delays': loaded_defaults.get('shorten_near_tp_delays', loaded_defaults.get('optimize_commands', False)), # Formerly optimize_commands
+        'view_distance_blocks': loaded_defaults.get('view_distance_blocks', 128),
+        'near_tp_delay': loaded_defaults.get('near_tp_delay', 2),
+        'prefetch_chunks': loaded_defaults.get('prefetch_chunks', 0),
+        'max_forceloaded_chunks': loaded_defaults.get('max_forceloaded_chunks', 256),
+        'forceload_delay': loaded_defaults.get('forceload_delay', 1),
+        'skip_air_tiles': loaded_defaults.get('skip_air_tiles', False),
+        'source_world_dir': loaded_defaults.get('source_world_dir', ""),
+        'heightmap_trim': loaded_defaults.get('heightmap_trim', False),
         'generate_json': loaded_defaults.get('generate_json', True),
         'json_filename': loaded_defaults.get('json_filename', os.path.join(os.path.expanduser("~"), ".minecraft", "macro", "macros.json")),
-        'dry_run': loaded_defaults.get('dry_run', True)
+        'dry_run': loaded_defaults.get('dry_run', True),
+        'tiling_engine': loaded_defaults.get('tiling_engine', "python"),
+        'max_copy_volume': loaded_defaults.get('max_copy_volume', 0),
+        'tile_sizing': loaded_defaults.get('tile_sizing', "fixed"),
+        'remove_overlaps': loaded_defaults.get('remove_overlaps', False),
+        'merge_boxes': loaded_defaults.get('merge_boxes', False),
+        'tile_order': loaded_defaults.get('tile_order', "row-major"),
+        'tile_alignment': loaded_defaults.get('tile_alignment', "none"),
+        'compact_json': loaded_defaults.get('compact_json', False),
+        'max_macro_messages': loaded_defaults.get('max_macro_messages', 0),
+        'macro_split_mode': loaded_defaults.get('macro_split_mode', "macros")
+    }
+
+def get_advanced_settings(settings):
+    """Prompts for the advanced planning options and stores them in settings."""
+    console.print(f"\n[{RICH_STYLES['plain_text']}]Advanced planning options (hit ENTER to keep the current value).[/]")
+    while True:
+        engine = get_input(f"Tiling engine ({'/'.join(TILING_ENGINES)})", default_value=settings['tiling_engine']).lower()
+        if engine in TILING_ENGINES:
+            settings['tiling_engine'] = engine
+            break
+        console.print(f"[{RICH_STYLES['error_text']}]Invalid tiling engine. Please choose one of: {', '.join(TILING_ENGINES)}.[/]")
+
+    # 0 keeps the classic X/Z-only tiling; anything else also splits tall regions along Y
+    settings['max_copy_volume'] = max(0, get_input("Max blocks per //copy, splits on X/Y/Z (0 = no limit)", default_value=settings['max_copy_volume'], value_type=int))
+    if settings['max_copy_volume']:
+        while True:
+            sizing = get_input(f"Tile sizing ({'/'.join(TILE_SIZING_MODES)}; adaptive picks tile dimensions per box)", default_value=settings['tile_sizing']).lower()
+            if sizing in TILE_SIZING_MODES:
+                settings['tile_sizing'] = sizing
+                break
+            console.print(f"[{RICH_STYLES['error_text']}]Invalid tile sizing. Please choose one of: {', '.join(TILE_SIZING_MODES)}.[/]")
+
+    settings['remove_overlaps'] = get_yes_no_input("Split overlapping source boxes so shared blocks are only copied once?", default_value=settings['remove_overlaps'])
+    settings['merge_boxes'] = get_yes_no_input("Merge source boxes that share a full face into larger cuboids?", default_value=settings['merge_boxes'])
+
+    while True:
+        order = get_input(f"Sub-region order ({'/'.join(TILE_ORDERS)}; nearest minimizes teleport distance)", default_value=settings['tile_order']).lower()
+        if order in TILE_ORDERS:
+            settings['tile_order'] = order
+            break
+        console.print(f"[{RICH_STYLES['error_text']}]Invalid sub-region order. Please choose one of: {', '.join(TILE_ORDERS)}.[/]")
+
+    # 0 keeps the classic copy -> switch world -> paste round trip for every tile
+    settings['schematic_batch_size'] = max(0, get_input("Tiles per world round trip, saved via //schem save/load (0 = no batching)", default_value=settings['schematic_batch_size'], value_type=int))
+    if settings['schematic_batch_size'] > 1:
+        settings['schematic_delay'] = get_input("Delay *after* //schem save and //schem load (ticks)", default_value=settings['schematic_delay'], value_type=int)
+
+    # Every per-tile world switch forgets the player's position, so only batched streams have /tp hops to shorten
+    if settings['schematic_batch_size'] > 1:
+        settings['shorten_near_tp_delays'] = get_yes_no_input("Shorten the delay after a /tp that stays within loaded chunks of the previous one, inside each schematic batch?", default_value=settings['shorten_near_tp_delays'])
+    else:
+        settings['shorten_near_tp_delays'] = False
+    if settings['shorten_near_tp_delays']:
+        settings['view_distance_blocks'] = get_input("Blocks around the player that stay loaded (server view distance x 16)", default_value=settings['view_distance_blocks'], value_type=int)
+        settings['near_tp_delay'] = get_input("Delay *after* a /tp within that distance (ticks)", default_value=settings['near_tp_delay'], value_type=int)
+
+    # 0 leaves chunk loading to the /tp commands, as before
+    settings['prefetch_chunks'] = max(0, get_input("Force-load chunks this many tiles ahead with /forceload (0 = off)", default_value=settings['prefetch_chunks'], value_type=int))
+    if settings['prefetch_chunks']:
+        settings['max_forceloaded_chunks'] = get_input("Max force-loaded chunks per world", default_value=settings['max_forceloaded_chunks'], value_type=int)
+        settings['forceload_delay'] = get_input("Delay *after* /forceload (ticks)", default_value=settings['forceload_delay'], value_type=int)
+        settings['near_tp_delay'] = get_input("Delay *after* a /tp into already loaded chunks (ticks)", default_value=settings['near_tp_delay'], value_type=int)
+
+    settings['skip_air_tiles'] = get_yes_no_input("Skip sub-regions that are all air (reads the source world's region files)?", default_value=settings['skip_air_tiles'])
+    settings['heightmap_trim'] = get_yes_no_input("Lower each sub-region's top to the terrain surface (reads the source world's heightmaps)?", default_value=settings['heightmap_trim'])
+    if settings['skip_air_tiles'] or settings['heightmap_trim']:
+        settings['source_world_dir'] = get_input("Source world folder (the one holding level.dat and region/)", default_value=settings['source_world_dir'])
+
+    while True:
+        alignment = get_input(f"Tile alignment ({'/'.join(TILE_ALIGNMENTS)}; snaps X/Z cuts to chunk or region-file borders)", default_value=settings['tile_alignment']).lower()
+        if alignment not in TILE_ALIGNMENTS:
+            console.print(f"[{RICH_STYLES['error_text']}]Invalid tile alignment. Please choose one of: {', '.join(TILE_ALIGNMENTS)}.[/]")
+        elif TILE_ALIGNMENTS[alignment] and 0 < settings['max_copy_volume'] < CHUNK_SIZE * CHUNK_SIZE:
+            # Aligned X/Z edges are at least one chunk, so even a 1-block-tall tile holds 16x1x16 blocks
+            console.print(f"[{RICH_STYLES['error_text']}]A {alignment} alignment needs a max copy volume of at least {CHUNK_SIZE * CHUNK_SIZE} blocks (currently {settings['max_copy_volume']}). Choose 'none' or raise the volume.[/]")
+        else:
+            settings['tile_alignment'] = alignment
+            break
+
+def new_macro_config():
+    """Returns a skeletal Macro Mod config with no profiles."""
+    return {
+        "version": 6,
+        "profiles": [],
+        "spDefault": 0,
+        "mpDefault": 0,
+        "defaultConflictStrategy": "SUBMIT",
+        "defaultSendMode": "SEND",
+        "defaultActivationType": "HOLD",
+        "ratelimitCount": 4,
+        "ratelimitTicks": 20,
+        "ratelimitStrict": False,
+        "ratelimitSp": False
     }
+
+def get_command_delay(settings, command_category, block_count=None):
+    """
+    Returns the delay in ticks to wait after a command of command_category ("mvtp", "tp", "copy", "paste" or "none").
+    ("schematic" is //schem save and //schem load, "forceload" is /forceload add and remove, and "near_tp" is a
+    /tp into chunks that are already loaded.)
+    With volume_scaled_delays on, //copy and //paste of block_count blocks wait in proportion to their size,
+    never less than min_scaled_delay and never more than the fixed copy_delay/paste_delay.
+    """
+    if command_category not in DELAY_CATEGORIES:
+        return 0
+    fixed_delay = settings[f'{command_category}_delay']
+    if settings['volume_scaled_delays'] and block_count is not None and command_category in SCALED_DELAY_COSTS:
+        scaled_delay = math.ceil(block_count * settings[SCALED_DELAY_COSTS[command_category]] / 1_000_000)
+        return min(fixed_delay, max(settings['min_scaled_delay'], scaled_delay))
+    return fixed_delay
+
+def macro_profile_name(settings):
+    """
+    Returns the Macro Mod profile name for the job in settings. Batch jobs (see load_batch_job_settings) are
+    prefixed with their job name, so several jobs between the same two worlds keep separate profiles.
+    """
+    profile_name = f"{settings['source_world']} -> {settings['target_world']}"
+    if settings.get('batch_job_name'):
+        profile_name = f"{settings['batch_job_name']}: {profile_name}"
+    if settings['dry_run']:
+        profile_name = f"DRY RUN: {profile_name}"
+    return profile_name
+
+def build_macro(messages):
+    """Returns one unbound Macro Mod macro that sends messages in order."""
+    return {
+        "version": 6,
+        "addToHistory": False,
+        "showHudMessage": False,
+        "resumeRepeating": False,
+        "useRatelimit": True,
+        "conflictStrategy": "SUBMIT",
+        "sendMode": "SEND",
+        "activationType": "VANILLA",
+        "spaceTicks": 0,
+        "keybind": {
+            "version": 0,
+            "keyName": "key.keyboard.unknown",
+            "limitKeyName": "key.keyboard.unknown"
+        },
+        "altKeybind": {
+            "version": 0,
+            "keyName": "key.keyboard.unknown",
+            "limitKeyName": "key.keyboard.unknown"
+        },
+        "messages": messages
+    }
+
+def build_macro_profile(profile_name, macro_message_lists):
+    """Returns a Macro Mod profile holding one macro per list in macro_message_lists."""
+    return {
+        "version": 4,
+        "name": profile_name,
+        "links": [],
+        "addToHistory": "OFF",
+        "showHudMessage": "OFF",
+        "resumeRepeating": "OFF",
+        "useRatelimit": "ON",
+        "macros": [build_macro(messages) for messages in macro_message_lists]
+    }
+
+def split_macro_messages(messages, sub_region_starts, max_messages):
+    """
+    Splits messages into consecutive parts of at most max_messages, cutting only where a sub-region starts
+    (sub_region_starts holds those message indices) so no tile is torn across two macros.
+    Every part but the last ends with a /say telling the player which part to run next, counted in its limit.
+    A single sub-region longer than the limit still gets a part of its own.
+    """
+    if not max_messages or len(messages) <= max_messages:
+        return [messages]
+
+    capacity = max(1, max_messages - 1) # Leave room for the hand-off message
+    parts = []
+    part_start = 0
+    last_boundary = 0 # Latest sub-region start that still fits in the current part
+    for boundary in list(sub_region_starts) + [len(messages)]:
+        if boundary - part_start > capacity and last_boundary > part_start:
+            parts.append(messages[part_start:last_boundary])
+            part_start = last_boundary
+        last_boundary = boundary
+    parts.append(messages[part_start:])
+
+    for part_number, (part, next_part) in enumerate(zip(parts, parts[1:]), start=1):
+        part.append({
+            "version": 1,
+            "string": f"/say Part {part_number} of {len(parts)} done. Run part {part_number + 1} next.",
+            "delayTicks": next_part[0]["delayTicks"] # Wait out the last paste before announcing the hand-off
+        })
+    return parts
+
+def build_macro_profiles(settings, json_commands_list, sub_region_starts):
+    """
+    Returns the Macro Mod profiles for a job. Normally that is one profile with one macro; with max_macro_messages
+    set, the command list is split at sub-region boundaries into several macros of one profile, or into several
+    numbered profiles, depending on macro_split_mode.
+    """
+    profile_name = macro_profile_name(settings)
+    parts = split_macro_messages(json_commands_list, sub_region_starts, settings['max_macro_messages'])
+    if len(parts) == 1 or settings['macro_split_mode'] == "macros":
+        return [build_macro_profile(profile_name, parts)]
+    return [build_macro_profile(f"{profile_name} (part {i} of {len(parts)})", [part])
+            for i, part in enumerate(parts, start=1)]
+
+def load_macro_config(macro_config_path):
+    """
+    Loads the Macro Mod config at macro_config_path, or a new skeletal config if the file does not exist yet.
+    Returns None if the file holds invalid JSON.
+    """
+    try:
+        config_dir = os.path.dirname(macro_config_path)
+        if config_dir:
+            os.makedirs(config_dir, exist_ok=True)
+        with open(macro_config_path, 'r') as f:
+            macro_json_data = json.load(f)
+        console.print(f"[{RICH_STYLES['plain_text']}]Successfully loaded existing Macro Mod config from '{macro_config_path}'.[/]")
+    except FileNotFoundError:
+        console.print(f"[{RICH_STYLES['warning_text']}]Macro Mod config file not found at '{macro_config_path}'. Creating a new skeletal config.[/]")
+        macro_json_data = new_macro_config()
+    except json.JSONDecodeError as e:
+        console.print(f"[{RICH_STYLES['error_text']}]ERROR: Invalid JSON in '{macro_config_path}': {e}. Please correct the file or choose a different path.[/]")
+        return None
+
+    if "profiles" not in macro_json_data:
+        macro_json_data["profiles"] = []
+    return macro_json_data
+
+def index_profiles_by_name(profile_names):
+    """Maps each profile name to the position of its first occurrence, like a front-to-back scan would find it."""
+    name_to_index = {}
+    for i, profile_name in enumerate(profile_names):
+        name_to_index.setdefault(profile_name, i)
+    return name_to_index
+
+def stale_profile_names(profile_names, new_profiles):
+    """
+    Returns the names among profile_names that an earlier run of the same job generated but new_profiles no
+    longer include: the plain profile name or a "(part i of n)" name whose base matches one of the new profiles,
+    e.g. part 3 of 3 after the job is regenerated in two parts.
+    """
+    new_names = {profile["name"] for profile in new_profiles}
+    base_names = {MACRO_PART_SUFFIX_PATTERN.sub("", name) for name in new_names}
+    return [name for name in profile_names
+            if isinstance(name, str) and name not in new_names and MACRO_PART_SUFFIX_PATTERN.sub("", name) in base_names]
+
+def upsert_macro_profiles(macro_json_data, new_profiles):
+    """
+    Replaces each profile with the same name in the config, or appends it, using one name -> index map
+    instead of scanning the profile list per profile. Profiles from an earlier split of the same job that are no
+    longer generated are removed (see stale_profile_names).
+    Returns (replaced, removed_names): one flag per new profile, True if it replaced one, and the removed names.
+    """
+    removed_names = stale_profile_names([profile.get("name") for profile in macro_json_data["profiles"]], new_profiles)
+    profiles = macro_json_data["profiles"] = [profile for profile in macro_json_data["profiles"] if profile.get("name") not in removed_names]
+    name_to_index = index_profiles_by_name(profile.get("name") for profile in profiles)
+    replaced = []
+    for new_profile in new_profiles:
+        index = name_to_index.get(new_profile["name"])
+        if index is None:
+            name_to_index[new_profile["name"]] = len(profiles)
+            profiles.append(new_profile)
+            replaced.append(False)
+        else:
+            profiles[index] = new_profile
+            replaced.append(True)
+    return replaced, removed_names
+
+def dump_macro_json(data, compact=False):
+    """Serializes Macro Mod JSON either indented (the default, easy to hand-edit) or compact."""
+    if compact:
+        return json.dumps(data, separators=(',', ':'))
+    return json.dumps(data, indent=2)
+
+def write_macro_config(macro_config_path, macro_json_data, compact=False):
+    """Writes the whole Macro Mod config back to disk. Returns False if the file could not be written."""
+    try:
+        with open(macro_config_path, 'w') as f:
+            f.write(dump_macro_json(macro_json_data, compact))
+        return True
+    except IOError as e:
+        console.print(f"[{RICH_STYLES['error_text']}]ERROR: Could not write updated Macro Mod config to '{macro_config_path}': {e}[/]")
+        return False
+
+def _skip_json_whitespace(config_text, position):
+    return JSON_WHITESPACE_PATTERN.match(config_text, position).end()
+
+def _expect_json_token(config_text, position, token, message):
+    """Returns the position just past token (and any whitespace after it) at position, or raises ValueError."""
+    if not config_text.startswith(token, position):
+        raise ValueError(message)
+    return _skip_json_whitespace(config_text, position + len(token))
+
+def index_macro_profiles(config_text):
+    """
+    Locates the top-level "profiles" array of a Macro Mod config and each profile in it, decoding one value at
+    a time with json's C scanner: the top-level values before the array, then every profile, of which only the
+    name is kept. Nothing after the array is read.
+    Returns (array_start, array_end, entries) where array_start/array_end are the offsets of its '[' and ']'
+    and entries is a list of (profile_name, start, end) text spans, one per profile object.
+    Raises ValueError if the text up to the end of the array is not valid JSON or there is no "profiles" array.
+    """
+    decoder = json.JSONDecoder()
+    position = _expect_json_token(config_text, _skip_json_whitespace(config_text, 0), "{", "Macro Mod config is not a JSON object.")
+    while True:
+        key, position = decoder.raw_decode(config_text, position)
+        if not isinstance(key, str):
+            raise ValueError("Macro Mod config has an invalid key.")
+        position = _expect_json_token(config_text, _skip_json_whitespace(config_text, position), ":", "Macro Mod config has an invalid key.")
+        if key == "profiles":
+            break
+        _, position = decoder.raw_decode(config_text, position)
+        position = _expect_json_token(config_text, _skip_json_whitespace(config_text, position), ",", "Macro Mod config has no top-level 'profiles' array.")
+
+    array_start = position
+    position = _expect_json_token(config_text, position, "[", "Macro Mod config's 'profiles' is not an array.")
+    entries = []
+    while not config_text.startswith("]", position):
+        if entries:
+            position = _expect_json_token(config_text, position, ",", "Macro Mod config's 'profiles' array is malformed.")
+        profile, end = decoder.raw_decode(config_text, position)
+        profile_name = profile.get("name") if isinstance(profile, dict) else None
+        entries.append((profile_name if isinstance(profile_name, str) else None, position, end)) # Unnamed entries are kept as they are
+        position = _skip_json_whitespace(config_text, end)
+    return array_start, position, entries
+
+def _format_spliced_profile(profile, compact=False):
+    """Serializes one profile so it lines up with the other entries of an indented (or compact) config."""
+    profile_text = dump_macro_json(profile, compact)
+    if compact:
+        return profile_text
+    # json escapes newlines inside strings, so every real line break here is structural
+    return profile_text.replace("\n", "\n" + MACRO_PROFILE_INDENT)
+
+def _write_file_atomically(file_path, pieces):
+    """Writes the text pieces, in order, to a temporary file next to file_path and swaps it into place."""
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.writelines(pieces)
+    os.replace(temp_path, file_path)
+
+def splice_macro_profiles(macro_config_path, new_profiles, compact=False):
+    """
+    Adds or replaces new_profiles in an existing Macro Mod config by editing its text in place,
+    so only the new profiles are serialized instead of the whole document. The file is written once.
+    Stale profiles from an earlier split of the same job are cut out (see stale_profile_names).
+    Returns (replaced, removed_names) like upsert_macro_profiles.
+    Raises FileNotFoundError if the config does not exist, and ValueError if it cannot be scanned or is laid out
+    differently from what compact asks for (so the whole document gets rewritten in one style instead).
+    Nothing is written in those cases.
+    """
+    with open(macro_config_path, 'r') as f:
+        config_text = f.read()
+    if compact == bool(JSON_INNER_LINE_BREAK_PATTERN.search(config_text)):
+        raise ValueError("Macro Mod config layout does not match the compact setting.")
+    array_start, array_end, entries = index_macro_profiles(config_text)
+    removed_names = stale_profile_names([profile_name for profile_name, _, _ in entries], new_profiles)
+    name_to_index = index_profiles_by_name(profile_name for profile_name, _, _ in entries)
+
+    profile_texts = {} # Index into entries, or past the end for appended profiles -> new text
+    appended_count = 0
+    replaced = []
+    for new_profile in new_profiles:
+        index = name_to_index.get(new_profile["name"])
+        replaced.append(index is not None)
+        if index is None:
+            index = name_to_index[new_profile["name"]] = len(entries) + appended_count
+            appended_count += 1
+        profile_texts[index] = _format_spliced_profile(new_profile, compact)
+        json.loads(profile_texts[index]) # Only the spliced text is new; the rest was checked by index_macro_profiles
+
+    # Pieces are new text or (start, end) spans of the old text, copied only while the file is written.
+    # Each kept entry brings along the separator that preceded it, so the file keeps its own layout.
+    kept_entries = [i for i, (profile_name, _, _) in enumerate(entries) if profile_name not in removed_names]
+    pieces = [(0, entries[0][1] if kept_entries else array_start + 1)]
+    for i in kept_entries:
+        _, start, end = entries[i]
+        separator_start = entries[i - 1][2] if i != kept_entries[0] else start
+        if i in profile_texts:
+            pieces += [(separator_start, start), profile_texts[i]]
+        elif isinstance(pieces[-1], tuple) and pieces[-1][1] == separator_start:
+            pieces[-1] = (pieces[-1][0], end) # Unchanged neighbours are written as one span
+        else:
+            pieces.append((separator_start, end))
+    position = entries[-1][2] if kept_entries else array_start + 1 # Past any stale entries after the last kept one
+
+    appended_texts = [profile_texts[i] for i in sorted(profile_texts) if i >= len(entries)]
+    separator = "," if compact else ",\n" + MACRO_PROFILE_INDENT
+    if kept_entries:
+        if appended_texts:
+            pieces.append(separator + separator.join(appended_texts))
+    else:
+        # Empty array, or every entry was stale: replace everything between '[' and ']'
+        if compact or not appended_texts:
+            pieces.append(separator.join(appended_texts))
+        else:
+            pieces.append("\n" + MACRO_PROFILE_INDENT + separator.join(appended_texts) + "\n" + MACRO_PROFILE_INDENT[:-2])
+        position = array_end
+    pieces.append((position, len(config_text)))
+
+    _write_file_atomically(macro_config_path, (piece if isinstance(piece, str) else config_text[piece[0]:piece[1]] for piece in pieces))
+    return replaced, removed_names
+
+def save_macro_profiles(macro_config_path, new_profiles, compact=False):
+    """
+    Adds or replaces each of new_profiles in the Macro Mod config, reading and writing the file only once.
+    An existing config already in the requested layout (compact or indented) has the profiles spliced into its
+    text instead of being re-serialized whole; any other config is rewritten whole in that layout.
+    Returns False if nothing was saved: the existing config holds invalid JSON (for a spliced config, up to the
+    end of its profiles array; the text after it is copied as it is) or could not be written.
+    """
+    replaced = None
+    if os.path.exists(macro_config_path):
+        try:
+            replaced, removed_names = splice_macro_profiles(macro_config_path, new_profiles, compact)
+        except ValueError:
+            pass # Invalid, or not a layout we can splice safely; load, validate and rewrite it below instead
+        except IOError as e:
+            console.print(f"[{RICH_STYLES['error_text']}]ERROR: Could not write updated Macro Mod config to '{macro_config_path}': {e}[/]")
+            return False
+
+    if replaced is None:
+        macro_json_data = load_macro_config(macro_config_path)
+        if macro_json_data is None:
+            return False
+        replaced, removed_names = upsert_macro_profiles(macro_json_data, new_profiles)
+        if not write_macro_config(macro_config_path, macro_json_data, compact):
+            return False
+
+    for profile_name in removed_names:
+        console.print(f"[{RICH_STYLES['plain_text']}]Removed Macro Mod profile '{profile_name}', which the job no longer generates.[/]")
+    for new_profile, was_replaced in zip(new_profiles, replaced):
+        if was_replaced:
+            console.print(f"[{RICH_STYLES['plain_text']}]Replaced existing Macro Mod profile '{new_profile['name']}'.[/]")
+        else:
+            console.print(f"[{RICH_STYLES['plain_text']}]Successfully added new Macro Mod profile '{new_profile['name']}' to config at '{macro_config_path}'.[/]")
+    return True
+
+def _sub_region_header(src_coords, target_coords, sub_region_number, total_sub_regions):
+    """Returns the comment that introduces one sub-region in the command stream."""
+    return f"# --- SUB-REGION {sub_region_number} of {total_sub_regions} (Source: {src_coords[0]},{src_coords[1]},{src_coords[2]} to {src_coords[3]},{src_coords[4]},{src_coords[5]} -> Target: {target_coords[0]},{target_coords[1]},{target_coords[2]}) ---"
+
+def iter_sub_region_commands(settings, src_coords, target_coords, sub_region_number, total_sub_regions):
+    """
+    Yields the commands that move one sub-region, as (command_string, command_category, is_comment, block_count)
+    tuples. command_category picks the delay that follows the command; block_count is set on //copy and //paste.
+    """
+    tile_block_count = box_volume(src_coords)
+    yield (_sub_region_header(src_coords, target_coords, sub_region_number, total_sub_regions), "none", True, None)
+    yield (f"/mvtp {settings['source_world']}", "mvtp", False, None)
+    yield (f"/tp {src_coords[0]} {src_coords[1]} {src_coords[2]}", "tp", False, None)
+    if settings['creative_mode']:
+        yield ("/gamemode creative", "none", False, None) # No delay category
+
+    yield (f"//pos1 {src_coords[0]},{src_coords[1]},{src_coords[2]}", "none", False, None) # No delay category
+    yield (f"//pos2 {src_coords[3]},{src_coords[4]},{src_coords[5]}", "none", False, None) # No delay category
+
+    yield ("//copy -be", "copy", False, tile_block_count)
+    yield (f"/mvtp {settings['target_world']}", "mvtp", False, None)
+    yield (f"/tp {target_coords[0]} {target_coords[1]} {target_coords[2]}", "tp", False, None)
+    if settings['creative_mode']:
+        yield ("/gamemode creative", "none", False, None) # No delay category
+
+    if settings['dry_run']:
+        yield (f"/say DRY RUN - Pasting from {src_coords[0]},{src_coords[1]},{src_coords[2]} to {target_coords[0]},{target_coords[1]},{target_coords[2]}", "paste", False, tile_block_count)
+    else:
+        yield ("//paste -be", "paste", False, tile_block_count)
+
+def iter_schematic_batch_commands(settings, batch, first_sub_region_number, total_sub_regions):
+    """
+    Yields the commands that move a batch of (src_coords, target_coords) sub-regions with one round trip between
+    the worlds: each tile is copied and saved with //schem save in the source world, then every schematic is
+    loaded and pasted in the target world. Same tuples as iter_sub_region_commands.
+    """
+    last_sub_region_number = first_sub_region_number + len(batch) - 1
+    yield (f"# --- SCHEMATIC BATCH: SUB-REGIONS {first_sub_region_number}-{last_sub_region_number} of {total_sub_regions} ---", "none", True, None)
+    yield (f"/mvtp {settings['source_world']}", "mvtp", False, None)
+    if settings['creative_mode']:
+        yield ("/gamemode creative", "none", False, None) # No delay category
+    for slot, (src_coords, target_coords) in enumerate(batch, start=1):
+        yield (_sub_region_header(src_coords, target_coords, first_sub_region_number + slot - 1, total_sub_regions), "none", True, None)
+        yield (f"/tp {src_coords[0]} {src_coords[1]} {src_coords[2]}", "tp", False, None)
+        yield (f"//pos1 {src_coords[0]},{src_coords[1]},{src_coords[2]}", "none", False, None) # No delay category
+        yield (f"//pos2 {src_coords[3]},{src_coords[4]},{src_coords[5]}", "none", False, None) # No delay category
+        yield ("//copy -be", "copy", False, box_volume(src_coords))
+        yield (f"//schem save -f {SCHEMATIC_NAME_PREFIX}{slot}", "schematic", False, None)
+
+    yield (f"/mvtp {settings['target_world']}", "mvtp", False, None)
+    if settings['creative_mode']:
+        yield ("/gamemode creative", "none", False, None) # No delay category
+    for slot, (src_coords, target_coords) in enumerate(batch, start=1):
+        yield (f"/tp {target_coords[0]} {target_coords[1]} {target_coords[2]}", "tp", False, None)
+        yield (f"//schem load {SCHEMATIC_NAME_PREFIX}{slot}", "schematic", False, None)
+        if settings['dry_run']:
+            yield (f"/say DRY RUN - Pasting from {src_coords[0]},{src_coords[1]},{src_coords[2]} to {target_coords[0]},{target_coords[1]},{target_coords[2]}", "paste", False, box_volume(src_coords))
+        else:
+            yield ("//paste -be", "paste", False, box_volume(src_coords))
+
+def make_near_teleport_pass(settings, stats):
+    """
+    Returns a pass over the command stream that shortens teleport delays: a function that takes an iterable of
+    command tuples (as yielded by iter_batch_commands) and yields them in order, with every /tp that lands within
+    view_distance_blocks (on X and Z) of the previous /tp in the same world turned into "near_tp", which waits
+    near_tp_delay instead of tp_delay because the chunks there are already loaded. No command is dropped; the
+    /tp itself is still needed, as //copy and //paste are anchored on the player.
+    A world switch forgets the position, so only schematic-batched streams, which visit several tiles per world,
+    have anything to shorten. It keeps its state across calls, so feed it the whole job in order.
+    stats["ticks_saved"] counts the delay ticks saved, comparing the macro delays with and without the pass.
+    """
+    world = None
+    position = None
+    # Pending delay state of the original and shortened streams, to count the ticks saved
+    original_delay_state = ["none", None]
+    shortened_delay_state = ["none", None]
+
+    def charge(delay_state, command):
+        command_string, command_category, _, block_count = command
+        ticks = get_command_delay(settings, delay_state[0], delay_state[1]) if command_string else 0
+        if command_category in DELAY_CATEGORIES:
+            delay_state[0], delay_state[1] = command_category, block_count
+        return ticks
+
+    def shorten(commands):
+        nonlocal world, position
+        for command in commands:
+            command_string, command_category, is_comment, block_count = command
+            stats["ticks_saved"] += charge(original_delay_state, command)
+            if not is_comment and command_category == "mvtp":
+                world, position = command_string.split(" ", 1)[1], None
+            elif not is_comment and command_category in ("tp", "near_tp"):
+                destination = tuple(int(value) for value in command_string.split()[1:4])
+                if position is not None and max(abs(destination[0] - position[0]), abs(destination[2] - position[2])) <= settings['view_distance_blocks']:
+                    command = (command_string, "near_tp", is_comment, block_count)
+                position = destination
+            stats["ticks_saved"] -= charge(shortened_delay_state, command)
+            yield command
+
+    return shorten
+
+def batch_chunk_sets(batch):
+    """Returns (source_chunks, target_chunks): the (chunk_x, chunk_z) columns a batch of sub-regions reads and writes."""
+    source_chunks = set()
+    target_chunks = set()
+    for src_coords, target_coords in batch:
+        width_x, width_z = src_coords[3] - src_coords[0], src_coords[5] - src_coords[2]
+        for chunks, (x1, z1) in ((source_chunks, (src_coords[0], src_coords[2])), (target_chunks, (target_coords[0], target_coords[2]))):
+            for chunk_x in range(x1 // CHUNK_SIZE, (x1 + width_x) // CHUNK_SIZE + 1):
+                for chunk_z in range(z1 // CHUNK_SIZE, (z1 + width_z) // CHUNK_SIZE + 1):
+                    chunks.add((chunk_x, chunk_z))
+    return source_chunks, target_chunks
+
+def chunk_rectangles(chunks, max_area=FORCELOAD_MAX_AREA):
+    """
+    Covers a set of (chunk_x, chunk_z) columns with as few (x1, z1, x2, z2) chunk rectangles as a row-by-row sweep finds,
+    none larger than max_area chunks, so each fits one /forceload command.
+    """
+    runs_by_row = {}
+    for chunk_x, chunk_z in sorted(chunks, key=lambda chunk: (chunk[1], chunk[0])):
+        runs = runs_by_row.setdefault(chunk_z, [])
+        if runs and runs[-1][1] == chunk_x - 1:
+            runs[-1][1] = chunk_x
+        else:
+            runs.append([chunk_x, chunk_x])
+
+    rectangles = []
+    open_rectangles = {} # (x1, x2) -> [x1, z1, x2, z2] still growing along Z
+    for chunk_z in sorted(runs_by_row):
+        still_open = {}
+        for x1, x2 in runs_by_row[chunk_z]:
+            rectangle = open_rectangles.pop((x1, x2), None)
+            width = min(x2 - x1 + 1, max_area)
+            if rectangle and rectangle[3] == chunk_z - 1 and (chunk_z - rectangle[1] + 1) * width <= max_area:
+                rectangle[3] = chunk_z
+            else:
+                if rectangle:
+                    rectangles.append(rectangle)
+                rectangle = [x1, chunk_z, x2, chunk_z]
+            still_open[(x1, x2)] = rectangle
+        rectangles.extend(open_rectangles.values()) # Runs that did not continue into this row
+        open_rectangles = still_open
+    rectangles.extend(open_rectangles.values())
+
+    # Rows wider than max_area chunks are cut into pieces
+    fitted = []
+    for x1, z1, x2, z2 in rectangles:
+        for piece_x1 in range(x1, x2 + 1, max_area):
+            fitted.append((piece_x1, z1, min(x2, piece_x1 + max_area - 1), z2))
+    return fitted
+
+def _forceload_commands(action, chunks):
+    """Returns the /forceload add|remove commands covering chunks, as command tuples."""
+    return [(f"/forceload {action} {x1 * CHUNK_SIZE} {z1 * CHUNK_SIZE} {x2 * CHUNK_SIZE + CHUNK_SIZE - 1} {z2 * CHUNK_SIZE + CHUNK_SIZE - 1}", "forceload", False, None)
+            for x1, z1, x2, z2 in chunk_rectangles(chunks)]
+
+def make_chunk_prefetcher(settings):
+    """
+    Returns a chunk prefetcher: a function taking (batch, upcoming_batches, commands) that yields the batch's commands
+    with /forceload commands woven in. In each world it force-loads the chunks of the upcoming batches (prefetch_chunks
+    of them) right after arriving, and releases the current batch's chunks once its copies or pastes are done, so the
+    upcoming tiles load while this one is worked on. /forceload acts on the player's current world, which is why it is
+    issued only after the /mvtp into that world. Chunks are reference-counted, so overlapping tiles do not unload each
+    other's chunks, and a batch is only prefetched if every world stays within max_forceloaded_chunks.
+    A /tp into a prefetched batch becomes "near_tp", as its chunks are already loaded. Call it for every batch in order.
+    """
+    source_world, target_world = settings['source_world'], settings['target_world']
+    loaded_chunks = {source_world: {}, target_world: {}} # World -> {chunk: number of prefetched batches using it}
+    prefetched_batches = {} # Batch index -> {world: chunks} held for it
+    next_batch_index = 0
+    next_batch_to_consider = 1
+
+    def reserve(batch_chunks):
+        """Takes a reference on each chunk; returns {world: chunks that were not loaded yet}, or None if over the cap."""
+        new_chunks = {world: chunks - loaded_chunks[world].keys() for world, chunks in batch_chunks.items()}
+        if any(len(loaded_chunks[world]) + len(chunks) > settings['max_forceloaded_chunks'] for world, chunks in new_chunks.items()):
+            return None
+        for world, chunks in batch_chunks.items():
+            for chunk in chunks:
+                loaded_chunks[world][chunk] = loaded_chunks[world].get(chunk, 0) + 1
+        return new_chunks
+
+    def release(batch_index, world):
+        """Drops the batch's references in world; returns the chunks no batch needs any more."""
+        released = set()
+        for chunk in prefetched_batches.get(batch_index, {}).pop(world, ()):
+            loaded_chunks[world][chunk] -= 1
+            if not loaded_chunks[world][chunk]:
+                del loaded_chunks[world][chunk]
+                released.add(chunk)
+        return released
+
+    def prefetch(batch, upcoming_batches, commands):
+        nonlocal next_batch_index, next_batch_to_consider
+        batch_index = next_batch_index
+        next_batch_index += 1
+        target_adds = set()
+        world_switches = 0
+
+        for command in commands:
+            command_string, command_category, is_comment, block_count = command
+            if command_category == "mvtp" and not is_comment:
+                world_switches += 1
+                if world_switches == 2: # Leaving the source world: its chunks for this batch are copied
+                    yield from _forceload_commands("remove", release(batch_index, source_world))
+                yield command
+                if world_switches == 1:
+                    source_adds = set()
+                    for offset, upcoming_batch in enumerate(upcoming_batches, start=1):
+                        upcoming_index = batch_index + offset
+                        if upcoming_index < next_batch_to_consider:
+                            continue
+                        next_batch_to_consider = upcoming_index + 1
+                        source_chunks, target_chunks = batch_chunk_sets(upcoming_batch)
+                        batch_chunks = {source_world: source_chunks}
+                        batch_chunks[target_world] = batch_chunks.get(target_world, set()) | target_chunks
+                        new_chunks = reserve(batch_chunks)
+                        if new_chunks is not None:
+                            prefetched_batches[upcoming_index] = batch_chunks
+                            source_adds |= new_chunks[source_world]
+                            if target_world != source_world:
+                                target_adds |= new_chunks[target_world]
+                    yield from _forceload_commands("add", source_adds)
+                else:
+                    yield from _forceload_commands("add", target_adds)
+                continue
+            if command_category == "tp" and batch_index in prefetched_batches:
+                command = (command_string, "near_tp", is_comment, block_count)
+            yield command
+
+        yield from _forceload_commands("remove", release(batch_index, target_world))
+        prefetched_batches.pop(batch_index, None)
+
+    return prefetch
+
+def iter_with_lookahead(items, depth):
+    """Yields (item, next_items) pairs, where next_items lists up to depth of the items that follow."""
+    iterator = iter(items)
+    window = deque(islice(iterator, depth + 1))
+    while window:
+        item = window.popleft()
+        yield item, list(window)
+        window.extend(islice(iterator, 1))
+
+def iter_transfer_batches(settings, sub_regions):
+    """
+    Groups (src_coords, target_coords) sub-regions into the batches moved per round trip between the worlds:
+    single tiles normally, schematic_batch_size tiles with schematic batching. Yields lists, keeping the order.
+    """
+    batch_size = max(1, settings['schematic_batch_size'])
+    batch = []
+    for sub_region in sub_regions:
+        batch.append(sub_region)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_batch_commands(settings, batch, first_sub_region_number, total_sub_regions):
+    """Yields the commands for one batch from iter_transfer_batches; a lone tile is moved directly, without a schematic."""
+    if len(batch) == 1:
+        src_coords, target_coords = batch[0]
+        return iter_sub_region_commands(settings, src_coords, target_coords, first_sub_region_number, total_sub_regions)
+    return iter_schematic_batch_commands(settings, batch, first_sub_region_number, total_sub_regions)
+
+def iter_job_batches(settings, sub_regions, total_sub_regions, near_tp_stats):
+    """
+    Yields (batch, commands) for every batch of the job, with chunk prefetching and shortened near-teleport
+    delays applied as configured. The ticks saved by the latter go into near_tp_stats.
+    """
+    shorten_near_tps = make_near_teleport_pass(settings, near_tp_stats) if settings['shorten_near_tp_delays'] else iter
+    prefetch = make_chunk_prefetcher(settings) if settings['prefetch_chunks'] else None
+    first_sub_region_number = 1
+    for batch, upcoming_batches in iter_with_lookahead(iter_transfer_batches(settings, sub_regions), settings['prefetch_chunks']):
+        commands = iter_batch_commands(settings, batch, first_sub_region_number, total_sub_regions)
+        if prefetch:
+            commands = prefetch(batch, upcoming_batches, commands)
+        yield batch, shorten_near_tps(commands)
+        first_sub_region_number += len(batch)
+
+def estimate_transfer_cost(settings):
+    """
+    Walks the planned sub-regions of the job in settings and adds up what running its macro will cost,
+    using the same delays the Macro Mod profile gets. Nothing is written or printed.
+    Returns a dict with sub_regions, commands, ticks, seconds, world_switches and blocks (blocks moved),
+    plus ticks_saved by shortened near-teleport delays when shorten_near_tp_delays is on
+    and skipped_air_tiles and lowered_tiles when skip_air_tiles or heightmap_trim is on.
+    """
+    overall_src_min_coords = calculate_overall_min_coords(settings['source_bounding_boxes'])
+    planning_boxes = prepare_bounding_boxes(settings)
+    total_sub_regions = count_planned_sub_regions(settings, planning_boxes)
+
+    estimate = {"sub_regions": 0, "commands": 0, "ticks": 0, "world_switches": 0, "blocks": 0,
+                "ticks_saved": 0, "skipped_air_tiles": 0, "lowered_tiles": 0}
+    previous_command_category = "none"
+    previous_command_block_count = None
+
+    def add_command(command_string, command_category="none", is_comment=False, block_count=None):
+        nonlocal previous_command_category, previous_command_block_count
+        estimate["commands"] += 1
+        estimate["ticks"] += get_command_delay(settings, previous_command_category, previous_command_block_count)
+        if command_category == "mvtp":
+            estimate["world_switches"] += 1
+        elif command_category == "paste":
+            estimate["blocks"] += block_count
+        if command_category in DELAY_CATEGORIES:
+            previous_command_category = command_category
+            previous_command_block_count = block_count
+
+    planned_sub_regions = plan_sub_regions(settings, planning_boxes, overall_src_min_coords)
+    if settings['skip_air_tiles'] or settings['heightmap_trim']:
+        planned_sub_regions = apply_source_world_scans(settings, planned_sub_regions, estimate)
+        total_sub_regions = len(planned_sub_regions)
+    # Sub-region order only changes the travel distance, which the fixed /tp delay does not depend on
+    for batch, commands in iter_job_batches(settings, planned_sub_regions, total_sub_regions, estimate):
+        for command in commands:
+            add_command(*command)
+        estimate["sub_regions"] += len(batch)
+    add_command(JOB_COMPLETE_MESSAGE, is_comment=True)
+
+    estimate["seconds"] = estimate["ticks"] / TICKS_PER_SECOND
+    return estimate
+
+def compare_sub_region_sizes(settings, sub_region_sizes):
+    """Returns (sub_region_size, estimate) for each candidate size, leaving settings itself unchanged."""
+    return [(size, estimate_transfer_cost(dict(settings, sub_region_size=size))) for size in sub_region_sizes]
+
+def format_duration(seconds):
+    """Formats a number of seconds as e.g. '2h 05m 09s'."""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {seconds:02d}s"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+def generate_transfer_commands(settings, echo_commands=True, save_profile=True):
+    """
+    Plans the sub-regions for the job in settings and emits every command to the console,
+    the plain text file and the Macro Mod config, as configured. Never prompts.
+    With echo_commands=False the individual commands are not rendered to the console.
+    Returns the generated Macro Mod profiles (empty if generate_json is off); with save_profile=False
+    they are not written to the config, so the caller can merge several jobs' profiles at once.
+    """
+    overall_src_min_coords = calculate_overall_min_coords(settings['source_bounding_boxes'])
+    planning_boxes = prepare_bounding_boxes(settings)
+    total_sub_regions = count_planned_sub_regions(settings, planning_boxes)
+
+    display_header(header_type="generating")
+    
+    output_file_handle = None
+    json_commands_list = [] # This will now be the 'messages' list for the new macro
+    sub_region_starts = [] # Index in json_commands_list where each sub-region (or schematic batch) begins, for splitting
+
+    previous_command_type_for_delay = "none"
+
+    previous_command_block_count = None
+
+    def print_write_and_json(command_string, command_category="none", is_comment=False, block_count=None):
+        nonlocal previous_command_type_for_delay, previous_command_block_count
+
+        # --- Console Output (skipped for headless runs) ---
+        if echo_commands:
+            if is_comment:
+                console.print(Text(command_string, style=RICH_STYLES["comment_style"]))
+            elif command_string:
+                console.print(Text(command_string, style=RICH_STYLES["command_style"]))
+            else: # Empty string, for visual spacing in console only
+                console.print("")
+
+        # --- File Output (plain text) ---
+        # Only write if the command_string is not empty AND it's not purely a comment
+        if settings['save_to_file'] and output_file_handle and command_string and not is_comment:
+            output_file_handle.write(command_string + '\n')
+
+        # --- JSON Output (Macro Mod) ---
+        # Only add to JSON list if the command_string is not empty and not purely a comment
+        if settings['generate_json'] and command_string:
+            delay_for_this_json_entry = get_command_delay(settings, previous_command_type_for_delay, previous_command_block_count)
+            
+            json_string_to_add = command_string.strip() 
+            
+            # For JSON, if it's not a command (starts with /), convert to /say for macro mod
+            # This applies to comments (like # --- SUB-REGION...) too, converting them to /say commands
+            if not json_string_to_add.startswith("/"):
+                json_string_to_add = f"/say {json_string_to_add}"
+
+            json_commands_list.append({
+                "version": 1,
+                "string": json_string_to_add,
+                "delayTicks": delay_for_this_json_entry
+            })
+
+        # Update previous command type *only if it was an actual command category*
+        if command_category in DELAY_CATEGORIES:
+             previous_command_type_for_delay = command_category
+             previous_command_block_count = block_count
+        # If it was a comment or a non-delay type, previous_command_type_for_delay remains unchanged
+        # This ensures delay is applied correctly to the *next* real command.
+
+
+    if settings['save_to_file']:
+        try:
+            output_file_handle = open(settings['output_filename'], 'w')
+            console.print(f"[{RICH_STYLES['plain_text']}]\nPlain text commands will also be saved to '{settings['output_filename']}' in the current directory ({os.getcwd()})\n[/]")
+        except IOError as e:
+            console.print(f"[{RICH_STYLES['error_text']}]ERROR: Could not open plain text file '{settings['output_filename']}' for writing: {e}[/]")
+            console.print(f"[{RICH_STYLES['plain_text']}]Plain text commands will only be printed to console.[/]")
+            settings['save_to_file'] = False
+            if output_file_handle:
+                output_file_handle.close()
+
+    near_tp_stats = {"ticks_saved": 0}
+    all_sub_regions = plan_sub_regions(settings, planning_boxes, overall_src_min_coords)
+    if settings['skip_air_tiles'] or settings['heightmap_trim']:
+        # Scanning needs every tile up front, so this mode gives up streaming too
+        scan_stats = {"skipped_air_tiles": 0, "lowered_tiles": 0}
+        all_sub_regions = apply_source_world_scans(settings, all_sub_regions, scan_stats)
+        total_sub_regions = len(all_sub_regions)
+        console.print(f"[{RICH_STYLES['plain_text']}]Skipping {scan_stats['skipped_air_tiles']} all-air sub-regions and lowering {scan_stats['lowered_tiles']} to the surface, from '{settings['source_world_dir']}'.[/]")
+    if settings['tile_order'] == "nearest":
+        # The route optimizer needs every tile up front, so this mode gives up streaming
+        all_sub_regions = list(all_sub_regions)
+        length_before = route_length(all_sub_regions)
+        all_sub_regions = order_sub_regions_for_travel(all_sub_regions)
+        length_after = route_length(all_sub_regions)
+        console.print(f"[{RICH_STYLES['plain_text']}]Travel route between sub-regions: {length_before:.0f} blocks in row-major order, {length_after:.0f} blocks nearest-first.[/]")
+    for batch, commands in iter_job_batches(settings, all_sub_regions, total_sub_regions, near_tp_stats):
+        sub_region_starts.append(len(json_commands_list)) # Macros are only split between batches
+        for command in commands:
+            print_write_and_json(*command)
+
+        if echo_commands:
+            console.print("") # Print empty line for console spacing ONLY, without creating a command
+
+    print_write_and_json(JOB_COMPLETE_MESSAGE, is_comment=True)
+
+    if output_file_handle:
+        output_file_handle.close()
+        console.print(f"\n[{RICH_STYLES['plain_text']}]All plain text commands successfully saved to '{settings['output_filename']}'.[/]")
+    if settings['shorten_near_tp_delays']:
+        console.print(f"[{RICH_STYLES['plain_text']}]Shorter delays after nearby /tp commands saved {near_tp_stats['ticks_saved']} delay ticks ({format_duration(near_tp_stats['ticks_saved'] / TICKS_PER_SECOND)}).[/]")
+
+    if not settings['generate_json']:
+        return []
+    new_profiles = build_macro_profiles(settings, json_commands_list, sub_region_starts)
+    if save_profile and not save_macro_profiles(settings['json_filename'], new_profiles, settings['compact_json']):
+        settings['generate_json'] = False
+    return new_profiles
+
+def main():
+    # Ensure jobs directory exists
+    _ensure_jobs_dir_exists()
+
+    # Load default settings from settings.json
+    loaded_defaults = load_default_settings()
+
+    # Initialize settings with loaded defaults or hardcoded defaults
+    settings = build_settings(loaded_defaults)
     
     display_header(header_type="welcome")
 
@@ -512,39 +2055,38 @@ def main():
             settings['tp_delay'] = get_input("Delay *after* /tp (ticks)", default_value=settings['tp_delay'], value_type=int)
             settings['copy_delay'] = get_input("Delay *after* //copy (ticks)", default_value=settings['copy_delay'], value_type=int)
             settings['paste_delay'] = get_input("Delay *after* //paste (ticks)", default_value=settings['paste_delay'], value_type=int)
+            settings['volume_scaled_delays'] = get_yes_no_input("Scale //copy and //paste delays by each tile's block count (the delays above become the maximum)?", default_value=settings['volume_scaled_delays'])
+            if settings['volume_scaled_delays']:
+                settings['copy_ticks_per_million_blocks'] = get_input("//copy cost (ticks per million blocks)", default_value=settings['copy_ticks_per_million_blocks'], value_type=int)
+                settings['paste_ticks_per_million_blocks'] = get_input("//paste cost (ticks per million blocks)", default_value=settings['paste_ticks_per_million_blocks'], value_type=int)
+                settings['min_scaled_delay'] = get_input("Minimum scaled delay (ticks)", default_value=settings['min_scaled_delay'], value_type=int)
 
             settings['generate_json'] = get_yes_no_input("Generate Macro Mod profile JSON?", default_value=settings['generate_json'])
             if settings['generate_json']:
                 settings['json_filename'] = get_input("Enter path to Macro Mod config JSON file (e.g., .minecraft/macro/macros.json)", default_value=settings['json_filename'])
+                settings['compact_json'] = get_yes_no_input("Write the Macro Mod config compact (no indentation, smaller and faster)?", default_value=settings['compact_json'])
+                settings['max_macro_messages'] = max(0, get_input("Max messages per macro, split at sub-region boundaries (0 = no limit)", default_value=settings['max_macro_messages'], value_type=int))
+                while settings['max_macro_messages']:
+                    split_mode = get_input(f"Put the parts into separate ({'/'.join(MACRO_SPLIT_MODES)})", default_value=settings['macro_split_mode']).lower()
+                    if split_mode in MACRO_SPLIT_MODES:
+                        settings['macro_split_mode'] = split_mode
+                        break
+                    console.print(f"[{RICH_STYLES['error_text']}]Invalid choice. Please choose one of: {', '.join(MACRO_SPLIT_MODES)}.[/]")
             else:
                 settings['json_filename'] = None
             
             settings['dry_run'] = get_yes_no_input("Run in DRY-RUN mode (no actual //paste operations)?", default_value=settings['dry_run'])
 
-        # --- Calculate overall min/max for all source bounding boxes ---
-        overall_src_min_coords = (0,0,0) # Default if no boxes, though get_bounding_boxes ensures at least one
+            if get_yes_no_input("Configure advanced planning options?", default_value=False):
+                get_advanced_settings(settings)
 
-        if settings['source_bounding_boxes']:
-            # Initialize with values from the first bbox
-            overall_min_x = settings['source_bounding_boxes'][0][0]
-            overall_min_y = settings['source_bounding_boxes'][0][1]
-            overall_min_z = settings['source_bounding_boxes'][0][2]
-            
-            # Iterate through all bounding boxes to find the true overall min/max
-            for bbox in settings['source_bounding_boxes']: 
-                overall_min_x = min(overall_min_x, bbox[0])
-                overall_min_y = min(overall_min_y, bbox[1])
-                overall_min_z = min(overall_min_z, bbox[2])
-            
-            overall_src_min_coords = (overall_min_x, overall_min_y, overall_min_z)
+        # --- Calculate overall min coords for all source bounding boxes ---
+        overall_src_min_coords = calculate_overall_min_coords(settings['source_bounding_boxes'])
+        box_overlaps = find_box_overlaps(settings['source_bounding_boxes'])
+        planning_boxes = prepare_bounding_boxes(settings)
 
-        # Generate sub-regions using the new overall_src_min_coords
-        all_sub_regions = []
-        for bbox in settings['source_bounding_boxes']:
-            # Pass the overall_src_min_coords to calculate_sub_regions
-            all_sub_regions.extend(calculate_sub_regions(bbox, settings['sub_region_size'], settings['target_paste_origin'], overall_src_min_coords))
-        
-        total_sub_regions = len(all_sub_regions)
+        # Only count the sub-regions here; they are generated lazily during command emission
+        total_sub_regions = count_planned_sub_regions(settings, planning_boxes)
 
         # --- Review and Confirm ---
         display_header(header_type="review")
@@ -554,10 +2096,24 @@ def main():
         console.print(f"[{RICH_STYLES['plain_text']}]Source Bounding Boxes:[/]")
         for i, box in enumerate(settings['source_bounding_boxes']):
             console.print(f"  [{RICH_STYLES['plain_text']}]Box {i+1}: ({box[0]}, {box[1]}, {box[2]}) to ({box[3]}, {box[4]}, {box[5]})[/]")
+        if box_overlaps:
+            duplicate_blocks = sum(overlap[2] for overlap in box_overlaps)
+            console.print(f"[{RICH_STYLES['warning_text']}]Overlapping Boxes: {len(box_overlaps)} pair(s) share {duplicate_blocks} blocks[/]")
+            for index_a, index_b, overlap_blocks in box_overlaps:
+                console.print(f"  [{RICH_STYLES['warning_text']}]Box {index_a+1} and Box {index_b+1}: {overlap_blocks} blocks[/]")
+            if settings['remove_overlaps']:
+                console.print(f"  [{RICH_STYLES['plain_text']}]Overlaps removed before tiling.[/]")
+        if len(planning_boxes) != len(settings['source_bounding_boxes']):
+            console.print(f"[{RICH_STYLES['plain_text']}]Boxes to Tile after Preprocessing: {len(planning_boxes)}[/]")
         console.print(f"[{RICH_STYLES['plain_text']}]Overall Source Min Coords (Anchor): ({overall_src_min_coords[0]}, {overall_src_min_coords[1]}, {overall_src_min_coords[2]})[/]")
         console.print(f"[{RICH_STYLES['plain_text']}]Target Paste Origin: ({settings['target_paste_origin'][0]}, {settings['target_paste_origin'][1]}, {settings['target_paste_origin'][2]})[/]")
         console.print(f"[{RICH_STYLES['plain_text']}]Sub-Region Size: {settings['sub_region_size']}[/]")
         console.print(f"[{RICH_STYLES['plain_text']}]Total Sub-Regions to Generate: {total_sub_regions}[/]")
+        estimate = estimate_transfer_cost(settings)
+        console.print(f"[{RICH_STYLES['plain_text']}]Estimated Macro Run Time: {format_duration(estimate['seconds'])} ({estimate['ticks']} ticks, {estimate['commands']} commands)[/]")
+        console.print(f"[{RICH_STYLES['plain_text']}]World Switches: {estimate['world_switches']}, Blocks Moved: {estimate['blocks']}[/]")
+        if settings['shorten_near_tp_delays']:
+            console.print(f"[{RICH_STYLES['plain_text']}]Near-Teleport Delays: saves {estimate['ticks_saved']} ticks ({settings['near_tp_delay']} ticks after /tp within {settings['view_distance_blocks']} blocks)[/]")
         
         if settings['save_to_file']:
             console.print(f"[{RICH_STYLES['plain_text']}]Save plain text commands to File: Yes (Filename: {settings['output_filename']})[/]")
@@ -565,15 +2121,34 @@ def main():
             console.print(f"[{RICH_STYLES['plain_text']}]Save plain text commands to File: No[/]")
 
         if settings['generate_json']:
-            console.print(f"[{RICH_STYLES['plain_text']}]Generate Macro Mod profile JSON: Yes (File: {settings['json_filename']})[/]")
+            console.print(f"[{RICH_STYLES['plain_text']}]Generate Macro Mod profile JSON: Yes (File: {settings['json_filename']}{', compact' if settings['compact_json'] else ''})[/]")
+            if settings['max_macro_messages']:
+                console.print(f"  [{RICH_STYLES['plain_text']}]Split into {settings['macro_split_mode']} of at most {settings['max_macro_messages']} messages[/]")
             console.print(f"  [{RICH_STYLES['plain_text']}]Delay *after* /mvtp: {settings['mvtp_delay']} ticks[/]")
             console.print(f"  [{RICH_STYLES['plain_text']}]Delay *after* /tp: {settings['tp_delay']} ticks[/]")
             console.print(f"  [{RICH_STYLES['plain_text']}]Delay *after* //copy: {settings['copy_delay']} ticks[/]")
             console.print(f"  [{RICH_STYLES['plain_text']}]Delay *after* //paste: {settings['paste_delay']} ticks[/]")
+            if settings['volume_scaled_delays']:
+                console.print(f"  [{RICH_STYLES['plain_text']}]Copy/paste delays scaled by tile volume: {settings['copy_ticks_per_million_blocks']}/{settings['paste_ticks_per_million_blocks']} ticks per million blocks, min {settings['min_scaled_delay']} ticks[/]")
         else:
             console.print(f"[{RICH_STYLES['plain_text']}]Generate Macro Mod profile JSON: No[/]")
 
         console.print(f"[{RICH_STYLES['plain_text']}]Dry-Run Mode: {'Yes (no actual //paste commands)' if settings['dry_run'] else 'No (will perform actual //paste commands)'}[/]")
+        console.print(f"[{RICH_STYLES['plain_text']}]Tiling Engine: {settings['tiling_engine']}[/]")
+        if settings['max_copy_volume']:
+            console.print(f"[{RICH_STYLES['plain_text']}]Max Blocks per //copy: {settings['max_copy_volume']} (volume-bounded X/Y/Z splitting)[/]")
+            console.print(f"[{RICH_STYLES['plain_text']}]Tile Sizing: {settings['tile_sizing']}[/]")
+        console.print(f"[{RICH_STYLES['plain_text']}]Sub-Region Order: {settings['tile_order']}[/]")
+        if settings['schematic_batch_size'] > 1:
+            console.print(f"[{RICH_STYLES['plain_text']}]Schematic Batching: {settings['schematic_batch_size']} tiles per world round trip ({settings['schematic_delay']} ticks after each //schem save/load)[/]")
+        if settings['prefetch_chunks']:
+            console.print(f"[{RICH_STYLES['plain_text']}]Chunk Prefetch: {settings['prefetch_chunks']} tile(s) ahead, at most {settings['max_forceloaded_chunks']} force-loaded chunks per world[/]")
+        if settings['skip_air_tiles']:
+            console.print(f"[{RICH_STYLES['plain_text']}]Skip All-Air Sub-Regions: Yes ({estimate['skipped_air_tiles']} skipped, world folder: {settings['source_world_dir']})[/]")
+        if settings['heightmap_trim']:
+            console.print(f"[{RICH_STYLES['plain_text']}]Heightmap Trim: Yes ({estimate['lowered_tiles']} sub-region tops lowered, world folder: {settings['source_world_dir']})[/]")
+        if settings['tile_alignment'] != "none":
+            console.print(f"[{RICH_STYLES['plain_text']}]Tile Alignment: {settings['tile_alignment']} ({TILE_ALIGNMENTS[settings['tile_alignment']]}-block grid)[/]")
 
         console.print(f"[{RICH_STYLES['warning_text']}]" + "#" * 60)
         console.print(f"[{RICH_STYLES['warning_text']}]{'CAUTION: Large operations will be generated!':^58}")
@@ -590,194 +2165,8 @@ def main():
             choice = '1' # Set choice back to '1' to re-enter inputs on next loop iteration
 
     # --- Generate Commands ---
-    display_header(header_type="generating")
-    
-    output_file_handle = None
-    json_commands_list = [] # This will now be the 'messages' list for the new macro
-
-    previous_command_type_for_delay = "none"
+    generate_transfer_commands(settings)
 
-    def print_write_and_json(command_string, command_category="none", is_comment=False):
-        nonlocal previous_command_type_for_delay
-
-        # --- Console Output ---
-        if is_comment:
-            console.print(Text(command_string, style=RICH_STYLES["comment_style"]))
-        elif command_string:
-            console.print(Text(command_string, style=RICH_STYLES["command_style"]))
-        else: # Empty string, for visual spacing in console only
-            console.print("")
-
-        # --- File Output (plain text) ---
-        # Only write if the command_string is not empty AND it's not purely a comment
-        if settings['save_to_file'] and output_file_handle and command_string and not is_comment:
-            output_file_handle.write(command_string + '\n')
-
-        # --- JSON Output (Macro Mod) ---
-        # Only add to JSON list if the command_string is not empty and not purely a comment
-        if settings['generate_json'] and command_string:
-            delay_for_this_json_entry = 0
-            if previous_command_type_for_delay == "mvtp":
-                delay_for_this_json_entry = settings['mvtp_delay']
-            elif previous_command_type_for_delay == "tp":
-                delay_for_this_json_entry = settings['tp_delay']
-            elif previous_command_type_for_delay == "copy":
-                delay_for_this_json_entry = settings['copy_delay']
-            elif previous_command_type_for_delay == "paste":
-                delay_for_this_json_entry = settings['paste_delay']
-            
-            json_string_to_add = command_string.strip() 
-            
-            # For JSON, if it's not a command (starts with /), convert to /say for macro mod
-            # This applies to comments (like # --- SUB-REGION...) too, converting them to /say commands
-            if not json_string_to_add.startswith("/"):
-                json_string_to_add = f"/say {json_string_to_add}"
-
-            json_commands_list.append({
-                "version": 1,
-                "string": json_string_to_add,
-                "delayTicks": delay_for_this_json_entry
-            })
-
-        # Update previous command type *only if it was an actual command category*
-        if command_category in ["mvtp", "tp", "copy", "paste"]:
-             previous_command_type_for_delay = command_category
-        # If it was a comment or a non-delay type, previous_command_type_for_delay remains unchanged
-        # This ensures delay is applied correctly to the *next* real command.
-
-
-    if settings['save_to_file']:
-        try:
-            output_file_handle = open(settings['output_filename'], 'w')
-            console.print(f"[{RICH_STYLES['plain_text']}]\nPlain text commands will also be saved to '{settings['output_filename']}' in the current directory ({os.getcwd()})\n[/]")
-        except IOError as e:
-            console.print(f"[{RICH_STYLES['error_text']}]ERROR: Could not open plain text file '{settings['output_filename']}' for writing: {e}[/]")
-            console.print(f"[{RICH_STYLES['plain_text']}]Plain text commands will only be printed to console.[/]")
-            settings['save_to_file'] = False
-            if output_file_handle:
-                output_file_handle.close()
-
-    sub_region_counter = 0
-    for i, (src_coords, target_coords) in enumerate(all_sub_regions):
-        sub_region_counter += 1
-        print_write_and_json(f"# --- SUB-REGION {sub_region_counter} of {total_sub_regions} (Source: {src_coords[0]},{src_coords[1]},{src_coords[2]} to {src_coords[3]},{src_coords[4]},{src_coords[5]} -> Target: {target_coords[0]},{target_coords[1]},{target_coords[2]}) ---", is_comment=True)
-        print_write_and_json(f"/mvtp {settings['source_world']}", "mvtp")
-        print_write_and_json(f"/tp {src_coords[0]} {src_coords[1]} {src_coords[2]}", "tp")
-        if settings['creative_mode']:
-            print_write_and_json("/gamemode creative", "none") # No delay category
-        
-        print_write_and_json(f"//pos1 {src_coords[0]},{src_coords[1]},{src_coords[2]}", "none") # No delay category
-        print_write_and_json(f"//pos2 {src_coords[3]},{src_coords[4]},{src_coords[5]}", "none") # No delay category
-
-        print_write_and_json(f"//copy -be", "copy")
-        print_write_and_json(f"/mvtp {settings['target_world']}", "mvtp")
-        print_write_and_json(f"/tp {target_coords[0]} {target_coords[1]} {target_coords[2]}", "tp")
-        if settings['creative_mode']:
-            print_write_and_json("/gamemode creative", "none") # No delay category
-        
-        if settings['dry_run']:
-            print_write_and_json(f"/say DRY RUN - Pasting from {src_coords[0]},{src_coords[1]},{src_coords[2]} to {target_coords[0]},{target_coords[1]},{target_coords[2]}", "paste")
-        else:
-            print_write_and_json(f"//paste -be", "paste")
-        
-        console.print("") # Print empty line for console spacing ONLY, without creating a command
-
-    print_write_and_json("/say WorldEdit transfer job complete! All regions processed.", is_comment=True)
-
-    if output_file_handle:
-        output_file_handle.close()
-        console.print(f"\n[{RICH_STYLES['plain_text']}]All plain text commands successfully saved to '{settings['output_filename']}'.[/]")
-
-    if settings['generate_json']:
-        macro_config_path = settings['json_filename']
-        macro_json_data = None
-
-        try:
-            os.makedirs(os.path.dirname(macro_config_path), exist_ok=True)
-            with open(macro_config_path, 'r') as f:
-                macro_json_data = json.load(f)
-            console.print(f"[{RICH_STYLES['plain_text']}]Successfully loaded existing Macro Mod config from '{macro_config_path}'.[/]")
-        except FileNotFoundError:
-            console.print(f"[{RICH_STYLES['warning_text']}]Macro Mod config file not found at '{macro_config_path}'. Creating a new skeletal config.[/]")
-            macro_json_data = {
-                "version": 6,
-                "profiles": [],
-                "spDefault": 0,
-                "mpDefault": 0,
-                "defaultConflictStrategy": "SUBMIT",
-                "defaultSendMode": "SEND",
-                "defaultActivationType": "HOLD",
-                "ratelimitCount": 4,
-                "ratelimitTicks": 20,
-                "ratelimitStrict": False,
-                "ratelimitSp": False
-            }
-        except json.JSONDecodeError as e:
-            console.print(f"[{RICH_STYLES['error_text']}]ERROR: Invalid JSON in '{macro_config_path}': {e}. Please correct the file or choose a different path.[/]")
-            settings['generate_json'] = False
-            macro_json_data = None
-
-        if macro_json_data:
-            profile_name = f"{settings['source_world']} -> {settings['target_world']}"
-            if settings['dry_run']:
-                profile_name = f"DRY RUN: {profile_name}"
-
-            new_profile = {
-                "version": 4,
-                "name": profile_name,
-                "links": [],
-                "addToHistory": "OFF",
-                "showHudMessage": "OFF",
-                "resumeRepeating": "OFF",
-                "useRatelimit": "ON",
-                "macros": [
-                    {
-                        "version": 6,
-                        "addToHistory": False,
-                        "showHudMessage": False,
-                        "resumeRepeating": False,
-                        "useRatelimit": True,
-                        "conflictStrategy": "SUBMIT",
-                        "sendMode": "SEND",
-                        "activationType": "VANILLA",
-                        "spaceTicks": 0,
-                        "keybind": {
-                            "version": 0,
-                            "keyName": "key.keyboard.unknown",
-                            "limitKeyName": "key.keyboard.unknown"
-                        },
-                        "altKeybind": {
-                            "version": 0,
-                            "keyName": "key.keyboard.unknown",
-                            "limitKeyName": "key.keyboard.unknown"
-                        },
-                        "messages": json_commands_list
-                    }
-                ]
-            }
-
-            if "profiles" not in macro_json_data:
-                macro_json_data["profiles"] = []
-            
-            # Check if a profile with the same name already exists and replace it
-            profile_exists = False
-            for i, profile in enumerate(macro_json_data["profiles"]):
-                if profile.get("name") == profile_name:
-                    macro_json_data["profiles"][i] = new_profile
-                    profile_exists = True
-                    console.print(f"[{RICH_STYLES['plain_text']}]Replaced existing Macro Mod profile '{profile_name}'.[/]")
-                    break
-            
-            if not profile_exists:
-                macro_json_data["profiles"].append(new_profile)
-                console.print(f"[{RICH_STYLES['plain_text']}]Successfully added new Macro Mod profile '{profile_name}' to config at '{macro_config_path}'.[/]")
-
-            try:
-                with open(macro_config_path, 'w') as f:
-                    json.dump(macro_json_data, f, indent=2)
-            except IOError as e:
-                console.print(f"[{RICH_STYLES['error_text']}]ERROR: Could not write updated Macro Mod config to '{macro_config_path}': {e}[/]")
-            
     display_header(header_type="complete")
 
     # --- Save Default Settings ---
@@ -788,6 +2177,213 @@ def main():
     if get_yes_no_input("Do you want to save this specific job for future use?", default_value=False):
         save_current_job(settings)
 
+def parse_setting_override(override_text):
+    """
+    Parses a KEY=VALUE settings override from the command line.
+    Values are read as JSON when possible (numbers, true/false, null, [x,y,z] lists), otherwise kept as plain strings.
+    """
+    if "=" not in override_text:
+        raise ValueError(f"Override '{override_text}' must be in KEY=VALUE format.")
+    key, raw_value = override_text.split("=", 1)
+    key = key.strip()
+    if key not in build_settings({}):
+        raise ValueError(f"Unknown setting '{key}'.")
+    try:
+        value = json.loads(raw_value)
+    except json.JSONDecodeError:
+        value = raw_value
+    return key, value
+
+def expand_job_paths(job_patterns):
+    """Expands job file arguments (plain paths or globs such as jobs/*.json) into a sorted, de-duplicated list."""
+    job_paths = []
+    for pattern in job_patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern] # Keep unmatched names so they are reported as missing
+        for path in matches:
+            if path not in job_paths:
+                job_paths.append(path)
+    return job_paths
+
+def load_batch_job_settings(job_path, loaded_defaults, overrides):
+    """
+    Builds the settings for one headless job: defaults, then the job file, then command-line overrides.
+    A '{job}' placeholder in output_filename or json_filename is replaced with the job's file name, which is
+    also kept in batch_job_name to tell the jobs' Macro Mod profiles apart.
+    """
+    job_name = os.path.splitext(os.path.basename(job_path))[0]
+    settings = build_settings(loaded_defaults)
+    settings.update(load_job_file(job_path))
+    settings.update(overrides)
+    normalize_job_settings(settings)
+    settings['batch_job_name'] = job_name
+    for key in ('output_filename', 'json_filename'):
+        if isinstance(settings.get(key), str):
+            settings[key] = settings[key].replace("{job}", job_name)
+    return settings
+
+def _init_batch_worker():
+    """Silences console output in pool workers; the parent process reports each job's result."""
+    global console
+    console = Console(quiet=True)
+
+def run_batch_job(job_path, loaded_defaults, overrides, echo_commands=False):
+    """
+    Plans and emits one saved job without prompts, leaving its Macro Mod profile unsaved.
+    Returns (job_path, json_filename, compact_json, profiles, error_message); profiles is empty if nothing should be saved.
+    """
+    try:
+        settings = load_batch_job_settings(job_path, loaded_defaults, overrides)
+    except FileNotFoundError:
+        return (job_path, None, False, [], f"Job file '{job_path}' not found.")
+    except json.JSONDecodeError as e:
+        return (job_path, None, False, [], f"Error decoding job file '{job_path}': {e}. The file might be corrupted.")
+
+    if not settings['source_bounding_boxes']:
+        return (job_path, None, False, [], f"Job '{job_path}' has no source bounding boxes. Skipping.")
+
+    console.print(f"[{RICH_STYLES['plain_text']}]Running job '{job_path}' ({settings['source_world']} -> {settings['target_world']})...[/]")
+    try:
+        profiles = generate_transfer_commands(settings, echo_commands=echo_commands, save_profile=False)
+    except Exception as e: # Bad settings in one job must not cost the other jobs their profiles
+        return (job_path, None, False, [], f"Job '{job_path}' failed: {type(e).__name__}: {e}")
+    return (job_path, settings['json_filename'], settings['compact_json'], profiles, None)
+
+def trim_job_file(job_path, loaded_defaults, overrides):
+    """
+    Trims a saved job's source boxes to the non-air blocks of its source world (see trim_bounding_boxes)
+    and writes the trimmed boxes and shifted target origin back into the job file. Returns an error message or None.
+    """
+    try:
+        settings = load_batch_job_settings(job_path, loaded_defaults, overrides)
+        with open(job_path, 'r') as f:
+            job_data = json.load(f)
+    except FileNotFoundError:
+        return f"Job file '{job_path}' not found."
+    except json.JSONDecodeError as e:
+        return f"Error decoding job file '{job_path}': {e}. The file might be corrupted."
+    world_dir = settings['source_world_dir']
+    if not world_dir or not os.path.isdir(os.path.join(world_dir, "region")):
+        return f"Job '{job_path}' has no source world folder with a region folder (set source_world_dir)."
+    if not settings['source_bounding_boxes']:
+        return f"Job '{job_path}' has no source bounding boxes. Skipping."
+
+    trimmed_boxes, target_paste_origin = trim_bounding_boxes(settings)
+    if not trimmed_boxes:
+        return f"Every source box of job '{job_path}' is all air in '{world_dir}'. Leaving the job unchanged."
+    volume_before = sum(box_volume(bbox) for bbox in settings['source_bounding_boxes'])
+    volume_after = sum(box_volume(bbox) for bbox in trimmed_boxes)
+    job_data['source_bounding_boxes'] = [list(bbox) for bbox in trimmed_boxes]
+    job_data['target_paste_origin'] = list(target_paste_origin)
+    try:
+        with open(job_path, 'w') as f:
+            json.dump(job_data, f, indent=2)
+    except IOError as e:
+        return f"Could not save job '{job_path}': {e}"
+    dropped_boxes = len(settings['source_bounding_boxes']) - len(trimmed_boxes)
+    console.print(f"[{RICH_STYLES['plain_text']}]Trimmed job '{job_path}': {volume_before} -> {volume_after} blocks ({dropped_boxes} all-air boxes dropped).[/]")
+    return None
+
+def trim_job_files(job_patterns, overrides):
+    """Trims the source boxes of every given job file. Returns the number of jobs that could not be trimmed."""
+    loaded_defaults = load_default_settings()
+    failures = 0
+    for job_path in expand_job_paths(job_patterns):
+        error_message = trim_job_file(job_path, loaded_defaults, overrides)
+        if error_message:
+            console.print(f"[{RICH_STYLES['error_text']}]Error: {error_message}[/]")
+            failures += 1
+    return failures
+
+def shares_output_file(job_paths, loaded_defaults, overrides):
+    """True if two of the jobs would write their plain text commands to the same file."""
+    output_paths = set()
+    for job_path in job_paths:
+        try:
+            settings = load_batch_job_settings(job_path, loaded_defaults, overrides)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue # Reported when the job runs
+        if not settings['save_to_file'] or not settings['output_filename']:
+            continue
+        output_path = os.path.abspath(settings['output_filename'])
+        if output_path in output_paths:
+            return True
+        output_paths.add(output_path)
+    return False
+
+def run_batch_jobs(job_patterns, overrides, echo_commands=False, workers=1):
+    """
+    Runs saved jobs without any prompts. With workers > 1 the jobs are planned and emitted
+    concurrently in a process pool. Either way, the generated profiles are merged into each
+    Macro Mod config in job order, and each config file is written once, by this process.
+    Returns the number of jobs that could not be generated.
+    """
+    loaded_defaults = load_default_settings()
+    job_paths = expand_job_paths(job_patterns)
+
+    if workers > 1 and len(job_paths) > 1 and shares_output_file(job_paths, loaded_defaults, overrides):
+        console.print(f"[{RICH_STYLES['warning_text']}]Several jobs write their plain text commands to the same file; running them one at a time. Put {{job}} in output_filename to run them in parallel.[/]")
+        workers = 1
+    if workers > 1 and len(job_paths) > 1:
+        console.print(f"[{RICH_STYLES['plain_text']}]Running {len(job_paths)} jobs across {workers} worker processes...[/]")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as executor:
+            futures = [executor.submit(run_batch_job, job_path, loaded_defaults, overrides) for job_path in job_paths]
+            results = []
+            for job_path, future in zip(job_paths, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e: # E.g. a worker process that died; the other jobs still count
+                    results.append((job_path, None, False, [], f"Job '{job_path}' failed: {type(e).__name__}: {e}"))
+    else:
+        results = [run_batch_job(job_path, loaded_defaults, overrides, echo_commands) for job_path in job_paths]
+
+    failures = 0
+    profiles_by_config = {} # (json_filename, compact_json) -> profiles, in job order
+    jobs_by_config = {} # (json_filename, compact_json) -> the jobs whose profiles go there
+    profile_jobs = {} # (json_filename, profile name) -> the job that generated it
+    for job_path, json_filename, compact_json, profiles, error_message in results:
+        if not error_message:
+            clashing_jobs = [profile_jobs[(json_filename, profile["name"])] for profile in profiles if (json_filename, profile["name"]) in profile_jobs]
+            if clashing_jobs:
+                error_message = f"Job '{job_path}' generates the same Macro Mod profile name as job '{clashing_jobs[0]}' in '{json_filename}'. Not saving its profiles."
+        if error_message:
+            console.print(f"[{RICH_STYLES['error_text']}]Error: {error_message}[/]")
+            failures += 1
+            continue
+        console.print(f"[{RICH_STYLES['plain_text']}]Generated job '{job_path}'.[/]")
+        for profile in profiles:
+            profile_jobs[(json_filename, profile["name"])] = job_path
+        if profiles:
+            profiles_by_config.setdefault((json_filename, compact_json), []).extend(profiles)
+            jobs_by_config.setdefault((json_filename, compact_json), []).append(job_path)
+
+    for config_key, profiles in profiles_by_config.items():
+        if not save_macro_profiles(config_key[0], profiles, config_key[1]):
+            failures += len(jobs_by_config[config_key])
+    return failures
+
+def parse_arguments(argv=None):
+    """Parses command-line arguments. With no job files given, the interactive assistant runs."""
+    parser = argparse.ArgumentParser(description="Minecraft WorldEdit Transfer Assistant. Run without arguments for the interactive assistant.")
+    parser.add_argument("jobs", nargs="*", help="Job files or globs (e.g. 'jobs/*.json') to run headless, without prompts.")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a setting for every job, e.g. --set sub_region_size=128 --set output_filename=out/{job}.txt")
+    parser.add_argument("--echo", action="store_true", help="Also print every generated command to the console in batch mode (ignored with --workers).")
+    parser.add_argument("-j", "--workers", type=int, default=1, metavar="N",
+                        help="Generate up to N jobs at once in separate processes (default: 1, one job at a time).")
+    parser.add_argument("--trim-boxes", action="store_true",
+                        help="Instead of generating, shrink each job's source boxes to the non-air blocks in its source_world_dir and save them back to the job file.")
+    args = parser.parse_args(argv)
+    try:
+        args.overrides = dict(parse_setting_override(override) for override in args.overrides)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
 
 if __name__ == "__main__":
+    args = parse_arguments()
+    if args.jobs and args.trim_boxes:
+        sys.exit(1 if trim_job_files(args.jobs, args.overrides) else 0)
+    if args.jobs:
+        sys.exit(1 if run_batch_jobs(args.jobs, args.overrides, echo_commands=args.echo, workers=args.workers) else 0)
     main()
\ No newline at end of file
@@ -0,0 +1,118 @@
+import os
+import struct
+import sys
+import tempfile
+import unittest
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anvil_regions import (
+    COMPRESSION_ZLIB,
+    EXTERNAL_CHUNK_FLAG,
+    MAX_CHUNK_SECTORS,
+    SECTOR_BYTES,
+    decompress_chunk,
+    external_chunk_path,
+    load_region_chunks,
+    parse_nbt,
+    shift_chunk_nbt,
+    write_region_chunks,
+)
+
+# --- NBT Builders ---
+def nbt_string(value):
+    encoded = value.encode()
+    return struct.pack(">H", len(encoded)) + encoded
+
+def nbt_tag(tag_type, name, payload):
+    return bytes([tag_type]) + nbt_string(name) + payload
+
+def nbt_compound(*items):
+    return b"".join(items) + b"\x00"
+
+def nbt_list(item_type, items):
+    return struct.pack(">bi", item_type, len(items)) + b"".join(items)
+
+def nbt_int(name, value):
+    return nbt_tag(3, name, struct.pack(">i", value))
+
+def sample_chunk(chunk_x, chunk_z):
+    """A chunk with a block entity, a scheduled tick and an entity, all inside the chunk."""
+    block_x, block_z = chunk_x * 16 + 3, chunk_z * 16 + 5
+    return b"\x0a" + nbt_string("") + nbt_compound(
+        nbt_int("xPos", chunk_x),
+        nbt_int("zPos", chunk_z),
+        nbt_tag(8, "Status", nbt_string("minecraft:full")),
+        nbt_tag(9, "block_entities", nbt_list(10, [nbt_compound(nbt_int("x", block_x), nbt_int("y", 70), nbt_int("z", block_z))])),
+        nbt_tag(9, "block_ticks", nbt_list(10, [nbt_compound(nbt_int("x", block_x), nbt_int("y", 71), nbt_int("z", block_z))])),
+        nbt_tag(9, "Entities", nbt_list(10, [nbt_compound(
+            nbt_tag(9, "Pos", nbt_list(6, [struct.pack(">d", block_x + 0.5), struct.pack(">d", 72.0), struct.pack(">d", block_z + 0.5)])),
+            nbt_int("TileX", block_x), nbt_int("TileY", 72), nbt_int("TileZ", block_z))])),
+    )
+
+# --- Tests ---
+class ShiftChunkNbtTest(unittest.TestCase):
+    def test_positions_are_moved(self):
+        chunk = parse_nbt(shift_chunk_nbt(sample_chunk(2, -3), 32, -160))
+        self.assertEqual((chunk["xPos"], chunk["zPos"]), (4, -13))
+        self.assertEqual([(entry["x"], entry["y"], entry["z"]) for entry in chunk["block_entities"]], [(67, 70, -203)])
+        self.assertEqual([(entry["x"], entry["y"], entry["z"]) for entry in chunk["block_ticks"]], [(67, 71, -203)])
+        entity = chunk["Entities"][0]
+        self.assertEqual(entity["Pos"], [67.5, 72.0, -202.5])
+        self.assertEqual((entity["TileX"], entity["TileY"], entity["TileZ"]), (67, 72, -203))
+
+    def test_zero_shift_keeps_bytes(self):
+        data = sample_chunk(5, 7)
+        self.assertEqual(shift_chunk_nbt(data, 0, 0), data)
+
+    def test_shift_back_restores_bytes(self):
+        data = sample_chunk(-1, 9)
+        self.assertEqual(shift_chunk_nbt(shift_chunk_nbt(data, 512, -48), -512, 48), data)
+
+    def test_unaligned_shift_is_refused(self):
+        with self.assertRaises(ValueError):
+            shift_chunk_nbt(sample_chunk(0, 0), 8, 0)
+
+class RegionRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.temporary_dir = tempfile.TemporaryDirectory()
+        self.region_dir = os.path.join(self.temporary_dir.name, "region")
+
+    def tearDown(self):
+        self.temporary_dir.cleanup()
+
+    def test_chunks_survive_write_and_load(self):
+        chunks = {(local_x, local_z): (COMPRESSION_ZLIB, zlib.compress(sample_chunk(32 + local_x, -32 + local_z)), 1000 + local_x)
+                  for local_x, local_z in [(0, 0), (31, 0), (5, 17), (31, 31)]}
+        write_region_chunks(self.region_dir, 1, -1, chunks)
+        self.assertEqual(load_region_chunks(self.region_dir, 1, -1), chunks)
+        self.assertFalse(os.path.exists(os.path.join(self.region_dir, "r.1.-1.mca.tmp")))
+
+    def test_oversized_chunk_goes_to_mcc(self):
+        payload = os.urandom(MAX_CHUNK_SECTORS * SECTOR_BYTES)
+        chunks = {(3, 4): (COMPRESSION_ZLIB, payload, 7), (0, 0): (COMPRESSION_ZLIB, zlib.compress(sample_chunk(0, 0)), 8)}
+        write_region_chunks(self.region_dir, 0, 0, chunks)
+        self.assertTrue(os.path.exists(external_chunk_path(self.region_dir, 3, 4)))
+        self.assertLess(os.path.getsize(os.path.join(self.region_dir, "r.0.0.mca")), len(payload))
+        self.assertEqual(load_region_chunks(self.region_dir, 0, 0), chunks)
+
+    def test_missing_mcc_keeps_reference(self):
+        payload = os.urandom(MAX_CHUNK_SECTORS * SECTOR_BYTES)
+        kept = (COMPRESSION_ZLIB, zlib.compress(sample_chunk(1, 1)), 9)
+        write_region_chunks(self.region_dir, 0, 0, {(3, 4): (COMPRESSION_ZLIB, payload, 7), (1, 1): kept})
+        os.remove(external_chunk_path(self.region_dir, 3, 4))
+
+        chunks = load_region_chunks(self.region_dir, 0, 0)
+        self.assertEqual(chunks[(1, 1)], kept)
+        self.assertEqual(chunks[(3, 4)], (COMPRESSION_ZLIB | EXTERNAL_CHUNK_FLAG, b"", 7))
+        self.assertIsNone(decompress_chunk(*chunks[(3, 4)][:2]))
+
+        write_region_chunks(self.region_dir, 0, 0, chunks)
+        self.assertEqual(load_region_chunks(self.region_dir, 0, 0), chunks)
+
+    def test_missing_region_file_loads_empty(self):
+        self.assertEqual(load_region_chunks(self.region_dir, 4, 4), {})
+
+if __name__ == "__main__":
+    unittest.main()
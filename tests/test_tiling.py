@@ -0,0 +1,56 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich_main import (
+    TILE_ALIGNMENTS,
+    TILE_SIZING_MODES,
+    box_volume,
+    build_settings,
+    calculate_overall_min_coords,
+    get_tile_size,
+    plan_sub_regions,
+)
+
+def random_boxes(count, seed):
+    rng = random.Random(seed)
+    boxes = []
+    for _ in range(count):
+        x1, y1, z1 = rng.randint(-700, 700), rng.randint(-64, 250), rng.randint(-700, 700)
+        boxes.append((x1, y1, z1, x1 + rng.randint(0, 300), y1 + rng.randint(0, 60), z1 + rng.randint(0, 300)))
+    return boxes
+
+def tile_settings(max_copy_volume, tile_sizing, tile_alignment):
+    settings = build_settings({})
+    settings.update(max_copy_volume=max_copy_volume, tile_sizing=tile_sizing, tile_alignment=tile_alignment,
+                    target_paste_origin=(0, 64, 0))
+    return settings
+
+class MaxCopyVolumeTest(unittest.TestCase):
+    def assert_tiles_within_volume(self, boxes, settings):
+        planned = list(plan_sub_regions(settings, boxes, calculate_overall_min_coords(boxes)))
+        self.assertEqual(sum(box_volume(src_coords) for src_coords, _ in planned), sum(box_volume(bbox) for bbox in boxes))
+        for src_coords, _ in planned:
+            self.assertLessEqual(box_volume(src_coords), settings['max_copy_volume'], (settings['tile_sizing'], settings['tile_alignment'], src_coords))
+
+    def test_every_planned_tile_fits(self):
+        boxes = random_boxes(40, 7)
+        for max_copy_volume in (256, 300, 2000, 32768, 1000000):
+            for tile_sizing in TILE_SIZING_MODES:
+                for tile_alignment in TILE_ALIGNMENTS:
+                    self.assert_tiles_within_volume(boxes, tile_settings(max_copy_volume, tile_sizing, tile_alignment))
+
+    def test_aligned_edges_shrink_to_fit(self):
+        self.assert_tiles_within_volume([(0, 64, 0, 199, 64, 199)], tile_settings(2000, "adaptive", "chunk"))
+        self.assert_tiles_within_volume([(-70, 4, -90, -29, 8, -68)], tile_settings(256, "adaptive", "chunk"))
+        self.assert_tiles_within_volume([(0, 0, 0, 1023, 3, 1023)], tile_settings(5000, "fixed", "region"))
+
+    def test_alignment_below_one_chunk_layer_is_refused(self):
+        with self.assertRaises(ValueError):
+            get_tile_size((0, 0, 0, 99, 9, 99), tile_settings(255, "fixed", "chunk"))
+
+if __name__ == "__main__":
+    unittest.main()